@@ -0,0 +1,77 @@
+#!/usr/bin/env python3.7
+"""Helpers shared by the challenge drivers: time limits for bot calls and a bit
+of statistics."""
+
+import math
+import signal
+import threading
+
+
+class BotTimeout(BaseException):
+    """Raised inside a bot that has used up its time.
+
+    This isn't an Exception so that bots with blanket exception handlers can't
+    swallow it."""
+
+
+# === Timers ===
+
+def timers_available():
+    """Whether set_timers can interrupt code (it needs setitimer and the main thread)."""
+    return (
+        hasattr(signal, 'setitimer')
+        and threading.current_thread() is threading.main_thread()
+    )
+
+
+def _raiser(exception, reason):
+    def raise_timeout(signum, frame):
+        raise exception(reason)
+    return raise_timeout
+
+
+def set_timers(wall=None, wall_reason=None, cpu=None, cpu_reason=None, exception=BotTimeout):
+    """Raise exception(reason) in the main thread once wall (seconds of wall
+    clock time) or cpu (seconds of CPU time) runs out. Either can be None.
+
+    Returns the signal handlers that were replaced; pass them to clear_timers
+    to stop the timers and put the handlers back."""
+    previous = []
+    try:
+        for limit, reason, signum, which in (
+            (wall, wall_reason, signal.SIGALRM, signal.ITIMER_REAL),
+            (cpu, cpu_reason, signal.SIGPROF, signal.ITIMER_PROF),
+        ):
+            if limit is not None:
+                previous.append(
+                    (signum, which, signal.signal(signum, _raiser(exception, reason)))
+                )
+                signal.setitimer(which, max(limit, 1e-6))
+    except BaseException:
+        # (Including a timer that ran out before it was all set up)
+        clear_timers(previous)
+        raise
+    return previous
+
+
+def clear_timers(previous):
+    """Stop the timers started by set_timers and restore the old handlers."""
+    for signum, which, handler in previous:
+        try:
+            signal.setitimer(which, 0)
+        finally:
+            signal.signal(signum, handler)
+
+
+# === Statistics ===
+
+def normal_quantile(p):
+    """Inverse CDF of the standard normal distribution (by bisection)."""
+    low, high = -40.0, 40.0
+    for _ in range(100):
+        mid = (low + high) / 2
+        if (1 + math.erf(mid / math.sqrt(2))) / 2 < p:
+            low = mid
+        else:
+            high = mid
+    return (low + high) / 2
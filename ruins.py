@@ -1,28 +1,48 @@
 #!/usr/bin/env python3.7
 
 import argparse
+import contextlib
+import csv
+import io
 import math
+import hashlib
 import heapq
 import importlib
+import importlib.util
 import itertools
+import json
+import marshal
+import multiprocessing
 import os.path
 import pickle
 import pkgutil
 import random
+import struct
+import subprocess
 import sys
 import time
 import traceback
-from collections import defaultdict, namedtuple
-from dataclasses import dataclass, field
-from typing import List
+from collections import defaultdict, deque, namedtuple
+from collections.abc import Sequence
+
+from harness import BotTimeout, clear_timers, normal_quantile, set_timers, timers_available
+
+try:
+    import se_scrape
+except ImportError:
+    if '--sandbox-worker' not in sys.argv:
+        print("Unable to import dependencies for scraping. Disabling SE scraping.", file=sys.stderr)
+    se_scrape = None
 
 try:
-    import requests
-    from lxml import html
+    import resource
 except ImportError:
-    print("Unable to import dependencies for scraping. Disabling SE scraping.", file=sys.stderr)
-    requests = None
-    html = None
+    resource = None
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 try:
     from tabulate import tabulate
@@ -62,6 +82,7 @@ MSG_COLORS = defaultdict(
     final='\x1b[96m',
     pool='\x1b[96m',
     winner='\x1b[92m',
+    timing='\x1b[36m',
 )
 MSG_TYPES = set(MSG_COLORS)
 
@@ -98,12 +119,18 @@ else:
 LOG_END = CLEAR_COLOR + '\n'
 LOG_SUPPRESS = set()
 
+def log_enabled(type):
+    """Whether messages of the given type will be shown.
+
+    Check this before building any message that is expensive to format."""
+    return type not in LOG_SUPPRESS
+
 def exception(message=None):
     if message:
         print(f"{MSG_COLORS['error']}{message}", file=sys.stdout)
     else:
         print(MSG_COLORS['error'], end='', file=sys.stdout)
-    traceback.print_exc()
+    traceback.print_exc(file=sys.stdout)
     print(CLEAR_COLOR, end='', file=sys.stdout)
 
 ALL = type('ALL', (), {'__contains__': lambda s,x: True, 'add': lambda s,x: None, 'update': lambda s, *_, **__: None})()
@@ -155,9 +182,29 @@ MONIKERS = [
 
 # lol Cloud McCloud is possible.
 
+TRAPS = [
+    "was sliced in half by a swinging blade trap.",
+    "fell into a pit of spikes.",
+    "was crushed by a boulder.",
+    "was eaten by a wild shriekbat.",
+    "was shot by a crossbow trap.",
+    "fell into a bottomless pit.",
+    "was devoured by a mimic.",
+    "was incinerated by a fire trap.",
+    "got sucked into a dimensional vortex.",
+    "mysteriously vanished.",
+    "was flung into a pool of acid.",
+    "was stung by a giant bee.",
+    "was absorbed by a gelatinous monster.",
+    "was bitten by a swarm of venomous snakes.",
+    "was decapitated by a sword trap"
+]
+
 # === Data structures for the game ===
 
 class Treasure(namedtuple('Treasure', ['name', 'value', 'weight'])):
+    __slots__ = ()
+
     def __str__(self):
         return f"{self.name} (${self.value}, {self.weight}kg)"
 
@@ -167,6 +214,8 @@ class RoomState(
         ['room', 'treasures', 'players', 'inventory', 'stamina']
     )
 ):
+    __slots__ = ()
+
     def __str__(self):
         builder = [
             f"Room #{self.room}",
@@ -191,16 +240,81 @@ class RoomState(
 
     @property
     def carry_weight(self):
-        return sum(treasure.weight for treasure in self.inventory)
+        try:
+            return self.inventory.carry_weight
+        except AttributeError:
+            return sum(treasure.weight for treasure in self.inventory)
 
     @property
     def total_value(self):
-        return sum(treasure.value for treasure in self.inventory)
+        try:
+            return self.inventory.total_value
+        except AttributeError:
+            return sum(treasure.value for treasure in self.inventory)
+
+
+class Inventory(tuple):
+    """Read-only copy of a player's treasures that knows their totals."""
+    def __new__(cls, treasures, carry_weight, total_value):
+        self = super().__new__(cls, treasures)
+        self.carry_weight = carry_weight
+        self.total_value = total_value
+        return self
+
+
+class Roommates(Sequence):
+    """Read-only view of the names of everyone in a room except one player.
+
+    Every player in a room shares the same tuple of names, so a snapshot
+    doesn't have to copy it.
+    """
+    __slots__ = ('_names', '_skip')
+
+    def __init__(self, names, skip=None):
+        self._names = names
+        self._skip = skip
+
+    def __len__(self):
+        return len(self._names) - (self._skip is not None)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(self)[index]
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("roommate index out of range")
+        if self._skip is not None and index >= self._skip:
+            index += 1
+        return self._names[index]
+
+    def __iter__(self):
+        for index, name in enumerate(self._names):
+            if index != self._skip:
+                yield name
+
+    def __contains__(self, name):
+        return name in self._names and (
+            self._skip is None or self._names[self._skip] != name
+        )
+
+    def __eq__(self, other):
+        if isinstance(other, Sequence) and not isinstance(other, str):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(tuple(self))
 
 
 Move = namedtuple('Move', ['direction'])
 Take = namedtuple('Take', ['treasure', 'bid'])
 Drop = namedtuple('Drop', ['treasure'])
+# Not a real action: stands in for the action of a bot that ran out of time
+Timeout = namedtuple('Timeout', ['limit'])
 
 
 # === Adventurers ===
@@ -239,25 +353,174 @@ class Drunkard(Adventurer):
         else:
             return action
 
+# === Time budgets ===
+
+class TimeBudget(
+    namedtuple(
+        'TimeBudget',
+        ['call_time', 'call_cpu', 'game_time', 'game_cpu'],
+        defaults=(None, None, None, None)
+    )
+):
+    """Wall clock and CPU limits (in seconds, or None) for a bot's actions."""
+    __slots__ = ()
+
+    def limits(self, player):
+        """The (wall limit, reason, CPU limit, reason) for the player's next call."""
+        wall = wall_reason = cpu = cpu_reason = None
+        for limit, reason, used in (
+            (self.call_time, 'per-call time', 0),
+            (self.game_time, 'per-game time', player.wall_time),
+        ):
+            if limit is not None and (wall is None or limit - used < wall):
+                wall, wall_reason = limit - used, reason
+        for limit, reason, used in (
+            (self.call_cpu, 'per-call CPU', 0),
+            (self.game_cpu, 'per-game CPU', player.cpu_time),
+        ):
+            if limit is not None and (cpu is None or limit - used < cpu):
+                cpu, cpu_reason = limit - used, reason
+        return wall, wall_reason, cpu, cpu_reason
+
+
+class LatencyHistogram:
+    """Histogram of call latencies in logarithmic buckets (about 19% wide).
+
+    Histograms from different games (or processes) can be merged."""
+    BUCKETS_PER_OCTAVE = 4
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        bucket = math.floor(math.log2(max(seconds, 1e-9)) * self.BUCKETS_PER_OCTAVE)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other):
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket containing the given fraction of calls."""
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= fraction * self.count:
+                return min(2 ** ((bucket + 1) / self.BUCKETS_PER_OCTAVE), self.max)
+        return self.max
+
+
 # === Player Information ===
 
-@dataclass
 class Player:
-    name: str
-    bot: Adventurer
-    room: int = 1
-    stamina: int = 1000
-    treasures: List[Treasure] = field(default_factory=list)
+    """A participant in one game.
+
+    Treasures must be added and removed through add_treasure, remove_treasure
+    and drop_all so that carry_weight and total_value stay up to date.
+    """
+    __slots__ = (
+        'name', 'bot', 'room', 'stamina', 'treasures', 'carry_weight', 'total_value',
+        '_inventory', 'wall_time', 'cpu_time', 'latencies', 'death_cause'
+    )
 
-    def get_action(self, state):
+    def __init__(self, name, bot, room=1, stamina=1000, treasures=()):
+        self.name = name
+        self.bot = bot
+        self.room = room
+        self.stamina = stamina
+        self.treasures = []
+        self.carry_weight = 0
+        self.total_value = 0
+        self._inventory = None
+        # Time spent in the bot's get_action during this game
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.latencies = LatencyHistogram()
+        self.death_cause = None
+        for treasure in treasures:
+            self.add_treasure(treasure)
+
+    def __repr__(self):
+        return (
+            f"Player(name={self.name!r}, bot={self.bot!r}, room={self.room!r},"
+            f" stamina={self.stamina!r}, treasures={self.treasures!r})"
+        )
+
+    def add_treasure(self, treasure):
+        self.treasures.append(treasure)
+        self.carry_weight += treasure.weight
+        self.total_value += treasure.value
+        self._inventory = None
+
+    def remove_treasure(self, index):
+        treasure = self.treasures.pop(index)
+        self.carry_weight -= treasure.weight
+        self.total_value -= treasure.value
+        self._inventory = None
+        return treasure
+
+    def drop_all(self):
+        treasures = self.treasures
+        self.treasures = []
+        self.carry_weight = 0
+        self.total_value = 0
+        self._inventory = None
+        return treasures
+
+    @property
+    def inventory(self):
+        """Read-only copy of the treasures, rebuilt only when they change."""
+        if self._inventory is None:
+            self._inventory = Inventory(self.treasures, self.carry_weight, self.total_value)
+        return self._inventory
+
+    def get_action(self, state, budget=None):
         if not self.active:
             return None
 
+        if budget is not None:
+            wall, wall_reason, cpu, cpu_reason = budget.limits(self)
+        else:
+            wall = wall_reason = cpu = cpu_reason = None
+        timers = (wall is not None or cpu is not None) and timers_available()
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
         try:
-            raw_action = self.bot.get_action(state)
+            if timers:
+                previous = set_timers(wall, wall_reason, cpu, cpu_reason)
+            try:
+                raw_action = self.bot.get_action(state)
+            finally:
+                if timers:
+                    clear_timers(previous)
+        except BotTimeout as e:
+            return Timeout(e.args[0])
         except Exception as e:
             exception(f"Exception from {self}: {str(e)}")
             return None
+        finally:
+            elapsed = time.perf_counter() - start_wall
+            cpu_elapsed = time.process_time() - start_cpu
+            self.wall_time += elapsed
+            self.cpu_time += cpu_elapsed
+            self.latencies.add(elapsed)
+
+        # Timers aren't available everywhere, so overruns that weren't
+        # interrupted count all the same
+        if wall is not None and elapsed > wall:
+            return Timeout(wall_reason)
+        if cpu is not None and cpu_elapsed > cpu:
+            return Timeout(cpu_reason)
 
         try:
             if raw_action == 'next':
@@ -274,14 +537,6 @@ class Player:
             exception(f"Invalid action from {self}: {raw_action}")
         return None
 
-    @property
-    def carry_weight(self):
-        return sum(treasure.weight for treasure in self.treasures)
-
-    @property
-    def total_value(self):
-        return sum(treasure.value for treasure in self.treasures)
-
     @property
     def active(self):
         return self.stamina > 0 and self.room > 0
@@ -296,12 +551,19 @@ class Player:
 
 class Ruins:
     pause_on_death = []
-
-    def __init__(self, *adventurers, seed=None):
+    time_budget = None
+    # 'exact' draws rooms from the game's random stream just like
+    # generate_room; 'numpy' generates them in vectorised batches, which is
+    # faster but gives different rooms for the same seed.
+    room_generator = 'exact'
+    ROOM_BATCH = 32
+
+    def __init__(self, *adventurers, seed=None, events=None, rooms=None):
         assert adventurers
         if seed is None:
             seed = random.getrandbits(6969)
         self._seed_obj = [adv.__name__ for adv in adventurers], seed
+        self.events = events
         self._replay_saved = False
         self.random = random.Random(seed)
         # create a separate random instance for flavor so that deaths and other
@@ -315,14 +577,33 @@ class Ruins:
                 for adventurer in adventurers
             )
         }
-        self.rooms = [self.generate_room(1)]
+        self.player_numbers = {name: i for i, name in enumerate(self.players)}
+        self._player_names = list(self.players)
+        # Room occupancy index: the numbers of the players in each room, plus
+        # a tuple of their names (in player order) that is rebuilt on demand
+        self.room_members = defaultdict(set)
+        self.room_members[1].update(self.player_numbers.values())
+        self._occupants = {}
+        # Treasure tuples shared by every snapshot of a room until it changes
+        self._room_views = {}
+        if events is not None:
+            events.game(seed, adventurers, list(self.players.values()))
+        self.rooms = []
+        # Rooms that have been generated (or supplied) but not reached yet
+        self._room_buffer = deque(rooms or ())
+        self.ensure_room(1)
         self.turn_number = 0
         self.complete = False
 
+    @staticmethod
+    def read_replay(replay_file):
+        """(adventurer class names, seed) from a replay file."""
+        with open(replay_file, 'rb') as f:
+            return pickle.load(f)
+
     @classmethod
     def from_replay(cls, replay_file, candidates):
-        with open(replay_file, 'rb') as f:
-            adv_names, seed = pickle.load(f)
+        adv_names, seed = cls.read_replay(replay_file)
         cand = {
             botclass.__name__: botclass
             for botclass in [*candidates, Drunkard]
@@ -362,38 +643,95 @@ class Ruins:
         n_treasures = self.random.randint(room // 3 + 3, room // 2 + 5)
         return [self.generate_treasure(room) for _ in range(n_treasures)]
 
+    def generate_rooms(self, first, count):
+        """Generate rooms first through first + count - 1.
+
+        In exact mode the rooms are identical to calling generate_room for each,
+        but randint is inlined (this is the same rejection sampling that
+        random.Random does internally), which makes it several times faster.
+        In numpy mode, whole batches of ROOM_BATCH rooms are generated at once,
+        so more rooms than asked for may be returned."""
+        if self.room_generator == 'numpy':
+            rooms = []
+            while len(rooms) < count:
+                rooms += self.generate_room_batch(first + len(rooms), self.ROOM_BATCH)
+            return rooms
+
+        getrandbits = self.random.getrandbits
+        def randint(low, high):
+            n = high - low + 1
+            k = n.bit_length()
+            r = getrandbits(k)
+            while r >= n:
+                r = getrandbits(k)
+            return low + r
+
+        treasure_num = self.treasure_num
+        rooms = []
+        for room in range(first, first + count):
+            value_dice = 5 * room + 10
+            treasures = []
+            for _ in range(randint(room // 3 + 3, room // 2 + 5)):
+                weight = max(1, randint(1, 6) + randint(1, 6) - 2)
+                value = randint(1, 10 * weight) + randint(1, value_dice) + randint(1, value_dice)
+                treasures.append(Treasure(f"Treasure #{next(treasure_num):03}", value, weight))
+            rooms.append(treasures)
+        return rooms
+
+    def generate_room_batch(self, first, count):
+        """Vectorised room generation with NumPy, seeded from the game's
+        random stream. The distributions are the same as generate_room's."""
+        rng = numpy.random.default_rng(self.random.getrandbits(128))
+        room_numbers = numpy.arange(first, first + count)
+        n_treasures = rng.integers(room_numbers // 3 + 3, room_numbers // 2 + 5, endpoint=True)
+        total = int(n_treasures.sum())
+        value_dice = numpy.repeat(5 * room_numbers + 10, n_treasures)
+        weights = numpy.maximum(1, rng.integers(1, 6, (2, total), endpoint=True).sum(0) - 2)
+        values = (
+            rng.integers(1, 10 * weights, endpoint=True)
+            + rng.integers(1, value_dice, (2, total), endpoint=True).sum(0)
+        )
+        treasures = [
+            Treasure(f"Treasure #{next(self.treasure_num):03}", value, weight)
+            for value, weight in zip(values.tolist(), weights.tolist())
+        ]
+        ends = itertools.accumulate(n_treasures.tolist())
+        return [
+            treasures[end - n:end]
+            for n, end in zip(n_treasures.tolist(), ends)
+        ]
+
     def ensure_room(self, room):
+        missing = room - len(self.rooms) - len(self._room_buffer)
+        if missing > 0:
+            self._room_buffer.extend(
+                self.generate_rooms(len(self.rooms) + len(self._room_buffer) + 1, missing)
+            )
         while len(self.rooms) < room:
-            self.rooms.append(self.generate_room(len(self.rooms) + 1))
+            self.rooms.append(self._room_buffer.popleft())
+            if self.events is not None:
+                self.events.room(len(self.rooms), self.rooms[-1])
 
     def trap(self):
-        return self.flavor_rand.choice([
-            "was sliced in half by a swinging blade trap.",
-            "fell into a pit of spikes.",
-            "was crushed by a boulder.",
-            "was eaten by a wild shriekbat.",
-            "was shot by a crossbow trap.",
-            "fell into a bottomless pit.",
-            "was devoured by a mimic.",
-            "was incinerated by a fire trap.",
-            "got sucked into a dimensional vortex.",
-            "mysteriously vanished.",
-            "was flung into a pool of acid.",
-            "was stung by a giant bee.",
-            "was absorbed by a gelatinous monster.",
-            "was bitten by a swarm of venomous snakes.",
-            "was decapitated by a sword trap"
-        ])
-
-    def kill(self, player, message):
+        # Always called (even when nothing is logged) so that flavor_rand
+        # advances identically with and without logging.
+        return self.flavor_rand.choice(TRAPS)
+
+    def kill(self, player, message, cause=None):
+        """Kill a player. The cause is a short, fixed description for metrics."""
         self.gamelog(player, message, type='bad')
+        player.death_cause = cause
+        if self.events is not None:
+            self.events.kill(self.player_numbers[player.name], message)
         player.stamina = 0
         if player.treasures:
-            self.rooms[player.room - 1] += player.treasures
-            self.gamelog(f"{player.name} dropped these items into room {player.room}:", type='debug')
-            for treasure in player.treasures:
-                self.gamelog(treasure, type='debug')
-            player.treasures = []
+            dropped = player.drop_all()
+            self.rooms[player.room - 1] += dropped
+            self.room_changed(player.room)
+            if log_enabled('debug'):
+                self.gamelog(f"{player.name} dropped these items into room {player.room}:", type='debug')
+                for treasure in dropped:
+                    self.gamelog(treasure, type='debug')
         if type(player.bot).__name__ in self.pause_on_death:
             if self._replay_saved:
                 input('Press enter to continue...')
@@ -405,7 +743,7 @@ class Ruins:
                         sys.exit(1)
 
     def gamelog(self, *message, type='info', end='', **kwargs):
-        if type in LOG_SUPPRESS:
+        if not log_enabled(type):
             return
         if self.complete:
             prefix = 'Game End'
@@ -429,40 +767,82 @@ class Ruins:
     #         print(f"[{prefix}] {line}")
     #     print(CLEAR_COLOR, end='')
 
+    def move_player(self, player, direction):
+        number = self.player_numbers[player.name]
+        self.room_members[player.room].discard(number)
+        self._occupants.pop(player.room, None)
+        player.room += direction
+        self.room_members[player.room].add(number)
+        self._occupants.pop(player.room, None)
+
+    def occupants(self, room):
+        """Names of everyone in the room (dead or alive), in player order, and
+        a mapping from each name to its position in that tuple."""
+        occupants = self._occupants.get(room)
+        if occupants is None:
+            names = tuple(
+                self._player_names[number]
+                for number in sorted(self.room_members[room])
+            )
+            occupants = self._occupants[room] = (
+                names,
+                {name: index for index, name in enumerate(names)}
+            )
+        return occupants
+
+    def room_changed(self, room):
+        self._room_views.pop(room, None)
+
+    def room_view(self, room):
+        view = self._room_views.get(room)
+        if view is None:
+            view = self._room_views[room] = tuple(self.rooms[room - 1])
+        return view
+
     def snapshot(self, player):
+        # Every part of the snapshot is a read-only view that is shared
+        # between turns (and roommates) until what it shows changes.
+        names, positions = self.occupants(player.room)
         return RoomState(
             player.room,
-            list(self.rooms[player.room - 1]),
-            [
-                other.name
-                for other in self.players.values()
-                if other is not player and other.room == player.room
-            ],
-            list(player.treasures),
+            self.room_view(player.room),
+            Roommates(names, positions.get(player.name)),
+            player.inventory,
             player.stamina
         )
 
     def turn(self):
         self.turn_number += 1
         self.gamelog("Turn", self.turn_number, "begins!", type='minor')
+        events = self.events
+        if events is not None:
+            events.turn(self.turn_number)
         bids = defaultdict(list)
         drops = defaultdict(list)
         kill_later = []
         actions = [ # Actions must resolve simultaneously
-            (player, player.get_action(self.snapshot(player)))
+            (player, player.get_action(self.snapshot(player), self.time_budget))
             for player in self.players.values()
             if player.active
         ]
         for player, action in actions:
             self.gamelog(player, action, type='debug')
+            if events is not None:
+                events.action(self.player_numbers[player.name], action)
             if action is None:
-                kill_later.append((player, f"{self.trap()} (Invalid action.)"))
+                kill_later.append((player, f"{self.trap()} (Invalid action.)", 'invalid action'))
+                continue
+
+            elif isinstance(action, Timeout):
+                kill_later.append((
+                    player, f"{self.trap()} (Exceeded {action.limit} limit.)", 'time limit'
+                ))
                 continue
 
             elif isinstance(action, Move):
                 cost = 10 + int(math.ceil(player.carry_weight / 5))
                 if player.stamina >= cost:
-                    player.room += action.direction
+                    self.move_player(player, action.direction)
                     player.stamina -= cost
                     self.ensure_room(player.room)
                     if player.room > 0:
@@ -470,11 +850,12 @@ class Ruins:
                             kill_later.append((
                                 player,
                                 f"collapsed in the doorway to room #{player.room}"
-                                " and died of exhaustion"
+                                " and died of exhaustion",
+                                'exhaustion'
                             ))
-                        else:
+                        elif log_enabled('info'):
                             self.gamelog(player, f"moved into room #{player.room}")
-                    else:
+                    elif log_enabled('minor'):
                         self.gamelog(
                             player,
                             f"""exited the ruins with {
@@ -489,7 +870,7 @@ class Ruins:
                             type='minor'
                         )
                 else:
-                    kill_later.append((player, "died of exhaustion"))
+                    kill_later.append((player, "died of exhaustion", 'exhaustion'))
                     continue
 
             elif isinstance(action, Take):
@@ -497,17 +878,25 @@ class Ruins:
                 try:
                     bid = int(bid)
                 except ValueError:
-                    kill_later.append((player, self.trap() + " (Non-integer bid)"))
+                    kill_later.append((
+                        player, self.trap() + " (Non-integer bid)", 'non-integer bid'
+                    ))
                     continue
 
                 try:
                     target = self.rooms[player.room - 1][int(treasure)]
                 except IndexError:
-                    kill_later.append((player, self.trap() + " (Invalid treasure index)"))
+                    kill_later.append((
+                        player, self.trap() + " (Invalid treasure index)", 'invalid treasure index'
+                    ))
                     continue
                 except (TypeError, ValueError):
                     kill_later.append(
-                        (player, f"{self.trap()} (Non-integer treasure index)")
+                        (
+                            player,
+                            f"{self.trap()} (Non-integer treasure index)",
+                            'non-integer treasure index'
+                        )
                     )
                     continue
 
@@ -515,16 +904,20 @@ class Ruins:
                 if bid < min_bid:
                     kill_later.append((
                         player,
-                        f"tried to lift {target.name} but {self.trap()} (Bid too low)"
+                        f"tried to lift {target.name} but {self.trap()} (Bid too low)",
+                        'bid too low'
                     ))
                 elif bid > player.stamina:
                     kill_later.append((
                         player,
                         f"went all out to take {target.name}, but had a heart attack and"
-                        " collapsed. (Bid too high)"
+                        " collapsed. (Bid too high)",
+                        'bid too high'
                     ))
                 elif target.weight + player.carry_weight > 50:
-                    kill_later.append((player, self.trap() + " (Treasure too heavy)"))
+                    kill_later.append((
+                        player, self.trap() + " (Treasure too heavy)", 'treasure too heavy'
+                    ))
                 else:
                     bids[player.room, treasure].append((bid, player.name))
                     player.stamina -= bid
@@ -534,62 +927,76 @@ class Ruins:
                 # has at least 1 stamina from the player.active check earlier
                 player.stamina -= 1
                 try:
-                    dropped = player.treasures.pop(int(action.treasure))
+                    dropped = player.remove_treasure(int(action.treasure))
                 except (IndexError, TypeError, ValueError):
                     kill_later.append((
                         player,
-                        "was bitten by a venomous spider and died moments later. (Invalid drop)"
+                        "was bitten by a venomous spider and died moments later. (Invalid drop)",
+                        'invalid drop'
                     ))
                 else:
                     drops[player.room].append(dropped)
-                    self.gamelog(
-                        player,
-                        f"Dropped a treasure into room #{player.room}:",
-                        dropped
-                    )
+                    if events is not None:
+                        events.drop(self.player_numbers[player.name], player.room, action.treasure)
+                    if log_enabled('info'):
+                        self.gamelog(
+                            player,
+                            f"Dropped a treasure into room #{player.room}:",
+                            dropped
+                        )
 
         for (room, index), bidlist in bids.items():
             treasure = self.rooms[room - 1][index]
             if len(bidlist) == 1:  # No competition over treasure
                 _, player = bidlist[0]
-                self.players[player].treasures.append(treasure)
+                self.players[player].add_treasure(treasure)
                 self.rooms[room - 1][index] = None
+                if events is not None:
+                    events.take(self.player_numbers[player], room, index)
                 self.gamelog(self.players[player], "took", treasure)
             elif len(bidlist) > 1:  # Multiple players going for same treasure
                 bidlist.sort(reverse=True)
                 if bidlist[0][0] > bidlist[1][0]:  # No one tied for first
                     _, player = bidlist.pop(0)
-                    self.players[player].treasures.append(treasure)
+                    self.players[player].add_treasure(treasure)
                     self.rooms[room - 1][index] = None
+                    if events is not None:
+                        events.take(self.player_numbers[player], room, index)
                     self.gamelog(self.players[player], "fought hard and took", treasure)
                 # everyone else is a loser
-                for _, player in bidlist:
-                    self.gamelog(
-                        self.players[player],
-                        f"attempted to take {treasure.name}, but was met with resistance."
-                    )
+                if log_enabled('info'):
+                    for _, player in bidlist:
+                        self.gamelog(
+                            self.players[player],
+                            f"attempted to take {treasure.name}, but was met with resistance."
+                        )
 
 
+        changed_rooms = {room for room, _ in bids}
         for room, items in drops.items():
             self.rooms[room - 1] += items
+            changed_rooms.add(room)
 
-        for room in self.rooms:
-            if None in room:
-                room[:] = [treasure for treasure in room if treasure]
+        for room in changed_rooms:
+            treasures = self.rooms[room - 1]
+            if None in treasures:
+                treasures[:] = [treasure for treasure in treasures if treasure]
+            self.room_changed(room)
 
-        for player, message in kill_later:
-            self.kill(player, message)
+        for player, message, cause in kill_later:
+            self.kill(player, message, cause)
 
     def run_game(self, tablefmt='presto'):
         self.gamelog("A new game begins!", type='major')
         self.gamelog("Competitors:")
         for player in self.players.values():
-            self.gamelog(f"* {player}")
+            if log_enabled('info'):
+                self.gamelog(f"* {player}")
             try:
                 player.bot.enter_ruins()
             except Exception:
                 exception(f"Failure to initialize {player.bot}")
-                self.kill(player, "is dead on arrival.")
+                self.kill(player, "is dead on arrival.", 'dead on arrival')
 
         while any(player.active for player in self.players.values()):
             # input()
@@ -615,32 +1022,850 @@ class Ruins:
             (player, n_players - index if player.alive and player.treasures else 0)
             for index, player in enumerate(ranked)
         ]
+        if self.events is not None:
+            by_number = {self.player_numbers[player.name]: score for player, score in scores}
+            self.events.end([by_number[i] for i in range(len(by_number))])
 
         self.gamelog(scores[0][0], "won the game", type='good')
-        self.gamelog(
-            "Score for this game:\n" +
-            tabulate(
-                [
+        if log_enabled('score'):
+            self.gamelog(
+                "Score for this game:\n" +
+                tabulate(
                     [
-                        player.bot.__class__.__name__,
-                        player.name,
-                        f'${player.total_value}' if player.alive else 'DEAD',
-                        len(player.treasures),
-                        player.carry_weight,
-                        player.stamina,
-                        score,
-                    ]
-                    for player, score in scores
-                ],
-                headers=['Bot Class', 'Character', 'Money', 'Treasures', 'Weight', 'Stamina', 'Score'],
-                colalign=['left',     'left',      'right',     'right',  'right',   'right', 'right'],
-                tablefmt=tablefmt
-            ),
-            type='score'
-        )
+                        [
+                            player.bot.__class__.__name__,
+                            player.name,
+                            f'${player.total_value}' if player.alive else 'DEAD',
+                            len(player.treasures),
+                            player.carry_weight,
+                            player.stamina,
+                            score,
+                        ]
+                        for player, score in scores
+                    ],
+                    headers=['Bot Class', 'Character', 'Money', 'Treasures', 'Weight', 'Stamina', 'Score'],
+                    colalign=['left',     'left',      'right',     'right',  'right',   'right', 'right'],
+                    tablefmt=tablefmt
+                ),
+                type='score'
+            )
 
         return scores
 
+# === Event logs ===
+#
+# An event log is a stream of compact binary records describing everything that
+# happened in one or more games. It is written as the games are played and only
+# ever appended to, so a tournament's worth of games can go into a single file.
+#
+# File layout: EVENT_LOG_MAGIC, then records. Every record is an event type
+# byte followed by its fields. Integers are zigzag varints, strings are a
+# varint length followed by UTF-8 bytes, and "values" (the raw arguments a bot
+# gave in its action) are a type tag followed by the value.
+
+EVENT_LOG_MAGIC = b'RUINSLOG\x01'
+
+(
+    EV_GAME,    # seed:value, n_adventurers, bot class:str * n_adventurers,
+                # n_players, (name:str, bot class:str) * n_players
+    EV_ROOM,    # room, n_treasures, (name:str, value, weight) * n_treasures
+    EV_TURN,    # turn number
+    EV_ACTION,  # player, kind, *args:value
+    EV_TAKE,    # player, room, treasure index:value
+    EV_DROP,    # player, room, inventory index:value
+    EV_KILL,    # player, reason:str
+    EV_END,     # n_players, score * n_players
+) = range(1, 9)
+
+ACTION_INVALID, ACTION_MOVE, ACTION_TAKE, ACTION_DROP, ACTION_TIMEOUT = range(5)
+ACTION_KINDS = {Move: ACTION_MOVE, Take: ACTION_TAKE, Drop: ACTION_DROP, Timeout: ACTION_TIMEOUT}
+ACTION_ARGS = {ACTION_INVALID: 0, ACTION_MOVE: 1, ACTION_TAKE: 2, ACTION_DROP: 1, ACTION_TIMEOUT: 1}
+
+
+def _pack_uint(buf, n):
+    while n >= 0x80:
+        buf.append(n & 0x7f | 0x80)
+        n >>= 7
+    buf.append(n)
+
+def _pack_int(buf, n):
+    _pack_uint(buf, n << 1 if n >= 0 else (-n << 1) - 1)
+
+def _pack_str(buf, s):
+    data = s.encode('utf-8', 'backslashreplace')
+    _pack_uint(buf, len(data))
+    buf += data
+
+def _pack_value(buf, value):
+    if isinstance(value, int):
+        buf += b'i'
+        _pack_int(buf, int(value))
+    elif isinstance(value, str):
+        buf += b's'
+        _pack_str(buf, value)
+    elif isinstance(value, float):
+        buf += b'f'
+        buf += struct.pack('<d', value)
+    elif value is None:
+        buf += b'n'
+    else:
+        # Anything more exotic is kept only for display
+        buf += b'r'
+        _pack_str(buf, repr(value))
+
+
+class EventLog:
+    """Writes game events to a binary stream (see the format notes above)."""
+    def __init__(self, stream):
+        self.stream = stream
+
+    @classmethod
+    def open(cls, filename):
+        stream = open(filename, 'ab')
+        if stream.tell() == 0:
+            stream.write(EVENT_LOG_MAGIC)
+        return cls(stream)
+
+    def close(self):
+        self.stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def _record(self, event, *ints):
+        buf = bytearray([event])
+        for n in ints:
+            _pack_int(buf, n)
+        return buf
+
+    def game(self, seed, adventurers, players):
+        buf = self._record(EV_GAME)
+        _pack_value(buf, seed)
+        # Players with clashing names are merged, so the adventurers the game
+        # was created with are needed as well to reproduce it.
+        _pack_int(buf, len(adventurers))
+        for adventurer in adventurers:
+            _pack_str(buf, adventurer.__name__)
+        _pack_int(buf, len(players))
+        for player in players:
+            _pack_str(buf, player.name)
+            _pack_str(buf, type(player.bot).__name__)
+        self.stream.write(buf)
+
+    def room(self, number, treasures):
+        buf = self._record(EV_ROOM, number, len(treasures))
+        for treasure in treasures:
+            _pack_str(buf, treasure.name)
+            _pack_int(buf, treasure.value)
+            _pack_int(buf, treasure.weight)
+        self.stream.write(buf)
+
+    def turn(self, number):
+        self.stream.write(self._record(EV_TURN, number))
+
+    def action(self, player, action):
+        buf = self._record(EV_ACTION, player, ACTION_KINDS.get(type(action), ACTION_INVALID))
+        if action is not None:
+            for arg in action:
+                _pack_value(buf, arg)
+        self.stream.write(buf)
+
+    def take(self, player, room, index):
+        buf = self._record(EV_TAKE, player, room)
+        _pack_value(buf, index)
+        self.stream.write(buf)
+
+    def drop(self, player, room, index):
+        buf = self._record(EV_DROP, player, room)
+        _pack_value(buf, index)
+        self.stream.write(buf)
+
+    def kill(self, player, reason):
+        buf = self._record(EV_KILL, player)
+        _pack_str(buf, reason)
+        self.stream.write(buf)
+
+    def end(self, scores):
+        self.stream.write(self._record(EV_END, len(scores), *scores))
+        # A game is the unit of recovery if the controller gets interrupted
+        self.stream.flush()
+
+
+class TruncatedEventLog(ValueError):
+    """An event log that stops partway through an event (as one from an
+    interrupted tournament can)."""
+
+
+class _EventReader:
+    """Parses events from a binary stream, a chunk at a time.
+
+    The parsing methods raise EOFError when they run off the end of the data
+    read so far; the event is then parsed again once more has been read."""
+    CHUNK_SIZE = 1 << 16
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.data = b''
+        self.pos = 0
+
+    def refill(self, start):
+        """Read another chunk, keeping the data from start on. False at the
+        end of the stream."""
+        chunk = self.stream.read(self.CHUNK_SIZE)
+        if not chunk:
+            return False
+        self.data = self.data[start:] + chunk
+        self.pos = 0
+        return True
+
+    def uint(self):
+        n = shift = 0
+        while True:
+            try:
+                byte = self.data[self.pos]
+            except IndexError:
+                raise EOFError from None
+            self.pos += 1
+            n |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                return n
+            shift += 7
+
+    def int(self):
+        n = self.uint()
+        return -((n + 1) >> 1) if n & 1 else n >> 1
+
+    def str(self):
+        length = self.uint()
+        if self.pos + length > len(self.data):
+            raise EOFError
+        self.pos += length
+        return self.data[self.pos - length:self.pos].decode('utf-8')
+
+    def value(self):
+        tag = self.data[self.pos:self.pos + 1]
+        if not tag:
+            raise EOFError
+        self.pos += 1
+        if tag == b'i':
+            return self.int()
+        elif tag == b's' or tag == b'r':
+            return self.str()
+        elif tag == b'f':
+            if self.pos + 8 > len(self.data):
+                raise EOFError
+            self.pos += 8
+            return struct.unpack('<d', self.data[self.pos - 8:self.pos])[0]
+        elif tag == b'n':
+            return None
+        raise ValueError(f"Corrupt event log: unknown value tag {tag!r}")
+
+    def event(self):
+        if self.pos >= len(self.data):
+            raise EOFError
+        event = self.data[self.pos]
+        self.pos += 1
+        if event == EV_GAME:
+            seed = self.value()
+            adventurers = [self.str() for _ in range(self.int())]
+            return event, seed, adventurers, [
+                (self.str(), self.str()) for _ in range(self.int())
+            ]
+        elif event == EV_ROOM:
+            room = self.int()
+            return event, room, [
+                Treasure(self.str(), self.int(), self.int())
+                for _ in range(self.int())
+            ]
+        elif event == EV_TURN:
+            return event, self.int()
+        elif event == EV_ACTION:
+            player, kind = self.int(), self.int()
+            return (event, player, kind, *[self.value() for _ in range(ACTION_ARGS[kind])])
+        elif event in (EV_TAKE, EV_DROP):
+            return event, self.int(), self.int(), self.value()
+        elif event == EV_KILL:
+            return event, self.int(), self.str()
+        elif event == EV_END:
+            return event, [self.int() for _ in range(self.int())]
+        else:
+            raise ValueError(f"Corrupt event log: unknown event type {event}")
+
+
+def is_event_log(filename):
+    with open(filename, 'rb') as f:
+        return f.read(len(EVENT_LOG_MAGIC)) == EVENT_LOG_MAGIC
+
+def read_events(filename):
+    """Yield (event type, *fields) tuples from an event log without running anything.
+
+    Fields are in the order documented next to the EV_* constants, with
+    repeated groups collected into lists of tuples. The log is read a chunk
+    at a time, and TruncatedEventLog is raised if it ends partway through an
+    event."""
+    with open(filename, 'rb') as f:
+        if f.read(len(EVENT_LOG_MAGIC)) != EVENT_LOG_MAGIC:
+            raise ValueError(f"{filename} is not an event log")
+        reader = _EventReader(f)
+        while True:
+            start = reader.pos
+            try:
+                event = reader.event()
+            except EOFError:
+                if reader.refill(start):
+                    continue
+                if start < len(reader.data):
+                    raise TruncatedEventLog(
+                        f"Truncated event log: {filename} ends partway through an event"
+                    ) from None
+                return
+            yield event
+
+
+class ReplayAdventurer(Adventurer):
+    """Stand-in for a bot that repeats the actions recorded in an event log."""
+    actions = ()
+    dead_on_arrival = False
+
+    def enter_ruins(self):
+        if self.dead_on_arrival:
+            raise RuntimeError("This adventurer was dead on arrival in the recorded game.")
+
+    def get_action(self, state):
+        kind, *args = next(self.actions)
+        if kind == ACTION_MOVE:
+            return 'next' if args[0] == 1 else 'previous'
+        elif kind == ACTION_TAKE:
+            return ('take', *args)
+        elif kind == ACTION_DROP:
+            return ('drop', *args)
+        elif kind == ACTION_TIMEOUT:
+            raise BotTimeout(*args)
+        else:
+            return ('invalid',)
+
+
+RecordedGame = namedtuple(
+    'RecordedGame',
+    ['seed', 'adventurers', 'players', 'rooms', 'actions', 'dead_on_arrival', 'scores']
+)
+
+def recorded_games(filename):
+    """Group the events of an event log into one RecordedGame per game.
+
+    rooms holds the treasures each room was generated with, actions holds
+    each player's list of (kind, *args) actions and scores holds
+    the recorded score of each player (in player order), if the game finished.
+    If the log is truncated, the games before the cut are still yielded
+    (with a warning), but not the one it cut off.
+    """
+    game = None
+    truncated = None
+    try:
+        for event, *fields in read_events(filename):
+            if event == EV_GAME:
+                if game is not None:
+                    yield game
+                seed, adventurers, players = fields
+                game = RecordedGame(seed, adventurers, players, [], [[] for _ in players], set(), [])
+                started = False
+            elif event == EV_ROOM:
+                game.rooms.append(fields[1])
+            elif event == EV_TURN:
+                started = True
+            elif event == EV_ACTION:
+                player, *action = fields
+                game.actions[player].append(action)
+            elif event == EV_KILL and not started:
+                game.dead_on_arrival.add(fields[0])
+            elif event == EV_END:
+                game.scores[:] = fields[0]
+    except TruncatedEventLog as e:
+        truncated = e
+    if game is not None and not game.scores and truncated is None:
+        truncated = TruncatedEventLog(
+            f"Truncated event log: {filename} ends partway through a game"
+        )
+    if truncated is not None:
+        print(
+            f"{MSG_COLORS['warning']}{truncated}; stopping after the last complete"
+            f" game.{CLEAR_COLOR}",
+            file=sys.stderr
+        )
+    if game is not None and game.scores:
+        yield game
+
+
+def replay_event_log(filename, tablefmt='presto', game_number=None):
+    """Replay games from an event log through the game engine.
+
+    No bot code is imported or run; each adventurer just repeats its recorded
+    actions, so this works even if the original bots have changed or are gone.
+    """
+    replay_classes = {}
+    for number, recorded in enumerate(recorded_games(filename), 1):
+        if game_number is not None and number != game_number:
+            continue
+        bots = []
+        for class_name in recorded.adventurers:
+            if class_name not in replay_classes:
+                replay_classes[class_name] = type(class_name, (ReplayAdventurer,), {})
+            bots.append(replay_classes[class_name])
+        # The recorded rooms are used, since they may not have been generated
+        # in exact mode
+        game = Ruins(*bots, seed=recorded.seed, rooms=recorded.rooms)
+        for i, player in enumerate(game.players.values()):
+            player.bot.actions = iter(recorded.actions[i])
+            player.bot.dead_on_arrival = i in recorded.dead_on_arrival
+        scores = dict(
+            (game.player_numbers[player.name], score)
+            for player, score in game.run_game(tablefmt=tablefmt)
+        )
+        if recorded.scores and [scores[i] for i in range(len(scores))] != recorded.scores:
+            print(
+                f"{MSG_COLORS['error']}Replayed scores of game {number} differ from the"
+                f" recorded ones. Has the game engine changed?{CLEAR_COLOR}",
+                file=sys.stderr
+            )
+
+
+# === Sandboxed bots ===
+#
+# In sandbox mode every bot class runs in its own long-lived worker process
+# (a fresh interpreter running this script with --sandbox-worker), which is
+# reused for every game. The controller only ever sees proxy adventurers, so a
+# bot that crashes, hangs or eats all its memory only takes its worker down.
+#
+# Messages in both directions are a 4-byte length followed by a marshalled
+# tuple. A room's treasures and a bot's inventory are only sent when they've
+# changed since the worker last saw them.
+
+class BotError(Exception):
+    """An error raised by (or on behalf of) a sandboxed bot."""
+
+
+def bot_spec(bot_class):
+    """(class name, module name, module file) for finding the bot class again
+    in another process."""
+    bot_class = getattr(bot_class, 'target', bot_class)
+    if issubclass(bot_class, LazyAdventurer):
+        return bot_class.spec
+    module = sys.modules[bot_class.__module__]
+    return bot_class.__name__, bot_class.__module__, getattr(module, '__file__', None)
+
+def load_bot_class(spec):
+    classname, modname, path = spec
+    return getattr(import_bot_module(modname, path), classname)
+
+
+def _write_frame(stream, payload):
+    stream.write(struct.pack('<I', len(payload)))
+    stream.write(payload)
+    stream.flush()
+
+def _read_frame(stream):
+    header = stream.read(4)
+    if len(header) < 4:
+        raise EOFError
+    payload = stream.read(struct.unpack('<I', header)[0])
+    return marshal.loads(payload)
+
+
+class BotProcess:
+    """Controller side of one sandbox worker process."""
+    def __init__(self, spec, memory_limit=None):
+        self.process = subprocess.Popen(
+            [
+                sys.executable, os.path.abspath(__file__), '--sandbox-worker',
+                *spec, str(memory_limit or 0)
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE
+        )
+        self.instances = itertools.count()
+        # The views the worker last saw, so that unchanged ones aren't resent
+        self.rooms_sent = {}
+        self.inventories_sent = {}
+
+    @property
+    def alive(self):
+        return self.process.poll() is None
+
+    def request(self, message, reply=True):
+        try:
+            _write_frame(self.process.stdin, marshal.dumps(message))
+            if not reply:
+                return None
+            status, result = _read_frame(self.process.stdout)
+        except (OSError, EOFError):
+            self.close()
+            raise BotError(
+                f"Sandbox worker exited with status {self.process.wait()}"
+            ) from None
+        except BaseException:
+            # Interrupted (e.g. by a time limit) mid-request: the worker is
+            # now out of step with us, so it can't be used again.
+            self.close()
+            raise
+        if status == 'error':
+            raise BotError(result)
+        return result
+
+    def encode_state(self, key, state):
+        room_view = state.treasures
+        if self.rooms_sent.get(state.room) is room_view:
+            treasures = None
+        else:
+            self.rooms_sent[state.room] = room_view
+            treasures = tuple(map(tuple, room_view))
+        if self.inventories_sent.get(key) is state.inventory:
+            inventory = None
+        else:
+            self.inventories_sent[key] = state.inventory
+            inventory = tuple(map(tuple, state.inventory))
+        return state.room, treasures, tuple(state.players), inventory, state.stamina
+
+    def close(self):
+        if self.alive:
+            self.process.kill()
+        self.process.wait()
+
+
+class BotSandbox:
+    """Runs bot classes in worker processes, one (reused) process per class."""
+    def __init__(self, memory_limit=None):
+        self.memory_limit = memory_limit
+        self.processes = {}
+        self.proxies = {}
+
+    def __getstate__(self):
+        # Tournament worker processes get a sandbox of their own
+        return {'memory_limit': self.memory_limit}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def process(self, bot_class):
+        spec = bot_spec(bot_class)
+        process = self.processes.get(spec)
+        if process is None or not process.alive:
+            process = self.processes[spec] = BotProcess(spec, self.memory_limit)
+        return process
+
+    def wrap(self, bot_class):
+        """A proxy adventurer class (with the same name) for bot_class."""
+        if bot_class not in self.proxies:
+            self.proxies[bot_class] = type(
+                bot_class.__name__,
+                (SandboxedAdventurer,),
+                {'sandbox': self, 'target': bot_class, '__module__': bot_class.__module__}
+            )
+        return self.proxies[bot_class]
+
+    def close(self):
+        for process in self.processes.values():
+            process.close()
+        self.processes.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+IpcStats = namedtuple('IpcStats', ['calls', 'round_trip', 'bot_time'])
+
+class SandboxedAdventurer(Adventurer):
+    """Proxy for a bot running in a sandbox worker process."""
+    sandbox = None
+    target = None
+
+    def __init__(self, name, random):
+        super().__init__(name, random)
+        self.ipc_stats = IpcStats(0, 0.0, 0.0)
+        self.error = None
+        self.bot_process = self.sandbox.process(self.target)
+        self.key = next(self.bot_process.instances)
+        try:
+            self.bot_process.request(('new', self.key, (name, random.getstate())))
+        except BotError as e:
+            self.error = e
+
+    def enter_ruins(self):
+        if self.error is not None:
+            raise self.error
+        self.bot_process.request(('enter', self.key, None))
+
+    def get_action(self, state):
+        if self.error is not None:
+            raise self.error
+        start = time.perf_counter()
+        action, bot_time = self.bot_process.request(
+            ('act', self.key, self.bot_process.encode_state(self.key, state))
+        )
+        calls, round_trip, total_bot_time = self.ipc_stats
+        self.ipc_stats = IpcStats(
+            calls + 1,
+            round_trip + time.perf_counter() - start,
+            total_bot_time + bot_time
+        )
+        return action
+
+    def __del__(self):
+        try:
+            self.bot_process.inventories_sent.pop(self.key, None)
+            if self.bot_process.alive:
+                self.bot_process.request(('del', self.key, None), reply=False)
+        except Exception:
+            pass
+
+
+def sandbox_worker(classname, modname, path, memory_limit):
+    """Worker process side of the sandbox: host instances of one bot class."""
+    # Keep the protocol stream to ourselves; anything the bot prints goes to stderr
+    channel_in = sys.stdin.buffer
+    channel_out = os.fdopen(os.dup(sys.stdout.fileno()), 'wb')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+
+    bot_class = load_bot_class((classname, modname, path))
+    memory_limit = int(memory_limit)
+    if memory_limit:
+        if resource is None:
+            print("Memory limits are not supported on this platform.", file=sys.stderr)
+        else:
+            resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+    bots = {}
+    rooms = {}
+    inventories = {}
+    while True:
+        try:
+            op, key, payload = _read_frame(channel_in)
+        except EOFError:
+            return
+        if op == 'del':
+            bots.pop(key, None)
+            inventories.pop(key, None)
+            continue
+        try:
+            if op == 'new':
+                name, rand_state = payload
+                rand = random.Random()
+                rand.setstate(rand_state)
+                bots[key] = bot_class(name, rand)
+                result = None
+            elif op == 'enter':
+                bots[key].enter_ruins()
+                result = None
+            elif op == 'act':
+                room, treasures, players, inventory, stamina = payload
+                if treasures is not None:
+                    rooms[room] = tuple(Treasure(*treasure) for treasure in treasures)
+                if inventory is not None:
+                    inventory = [Treasure(*treasure) for treasure in inventory]
+                    inventories[key] = Inventory(
+                        inventory,
+                        sum(treasure.weight for treasure in inventory),
+                        sum(treasure.value for treasure in inventory)
+                    )
+                state = RoomState(room, rooms[room], players, inventories[key], stamina)
+                start = time.perf_counter()
+                action = bots[key].get_action(state)
+                result = action, time.perf_counter() - start
+            # (Actions that aren't plain data can't be marshalled and fail here)
+            reply = marshal.dumps(('ok', result))
+        except Exception as e:
+            reply = marshal.dumps(('error', f"{type(e).__name__}: {e}"))
+        _write_frame(channel_out, reply)
+
+
+class LeadTest:
+    """Sequential test on the per-game score difference between two finalists.
+
+    Totals and sums of squared per-game differences are kept for every pair of
+    bots, so the interval for whichever two bots currently lead is available
+    without replaying the series. Since the interval is checked after every
+    game, pick a fairly high confidence.
+    """
+    def __init__(self, confidence):
+        self.confidence = confidence
+        self.z = normal_quantile(confidence)
+        self.games = 0
+        self.totals = defaultdict(int)
+        self.squares = defaultdict(int)
+
+    def add(self, results):
+        self.games += 1
+        game = dict(results)
+        for botname, score in game.items():
+            self.totals[botname] += score
+        for a, b in itertools.combinations(sorted(game), 2):
+            self.squares[a, b] += (game[a] - game[b]) ** 2
+
+    def interval(self, first, second):
+        """Confidence interval for the mean per-game lead of first over second."""
+        n = self.games
+        if n < 2:
+            return -math.inf, math.inf
+        mean = (self.totals[first] - self.totals[second]) / n
+        variance = (self.squares[tuple(sorted((first, second)))] - n * mean * mean) / (n - 1)
+        margin = self.z * math.sqrt(max(variance, 0) / n)
+        return mean - margin, mean + margin
+
+
+GameReport = namedtuple('GameReport', ['scores', 'latencies', 'ipc', 'metrics'])
+GameMetrics = namedtuple('GameMetrics', ['duration', 'turns', 'bots'])
+BotMetrics = namedtuple(
+    'BotMetrics',
+    ['players', 'score', 'deaths', 'exits', 'exit_stamina', 'action_time']
+)
+
+def play_game(bots, seed, tablefmt='presto', events=None):
+    """Play a single game and report on it.
+
+    scores holds (bot class name, score) pairs for every non-Drunkard player,
+    in ranking order, latencies maps each bot class name to a
+    LatencyHistogram of its get_action calls, ipc maps each sandboxed bot
+    class name to its IpcStats and metrics is the game's GameMetrics, with a
+    BotMetrics for every bot class (Drunkards included)."""
+    start = time.perf_counter()
+    game = Ruins(*bots, seed=seed, events=events)
+    ranking = game.run_game(tablefmt=tablefmt)
+    duration = time.perf_counter() - start
+    latencies = defaultdict(LatencyHistogram)
+    ipc = {}
+    bot_metrics = {}
+    for player, score in ranking:
+        botname = type(player.bot).__name__
+        latencies[botname].merge(player.latencies)
+        if isinstance(player.bot, SandboxedAdventurer):
+            ipc[botname] = IpcStats(*map(sum, zip(
+                ipc.get(botname, (0, 0.0, 0.0)), player.bot.ipc_stats
+            )))
+        players, total_score, deaths, exits, exit_stamina, action_time = bot_metrics.get(
+            botname, (0, 0, {}, 0, 0, 0.0)
+        )
+        if player.alive:
+            exits += 1
+            exit_stamina += player.stamina
+        else:
+            deaths = {**deaths, player.death_cause: deaths.get(player.death_cause, 0) + 1}
+        bot_metrics[botname] = BotMetrics(
+            players + 1, total_score + score, deaths, exits, exit_stamina,
+            action_time + player.wall_time
+        )
+    return GameReport(
+        [
+            (type(player.bot).__name__, score)
+            for player, score in ranking
+            if not isinstance(player.bot, Drunkard)
+        ],
+        dict(latencies),
+        ipc,
+        GameMetrics(duration, game.turn_number, bot_metrics)
+    )
+
+
+class MetricsLog:
+    """Per-game tournament metrics, written as each game is recorded.
+
+    There is a row for every bot class in every game, in JSON lines or (if the
+    file name ends with .csv) CSV. Game-wide fields are repeated on each row.
+    action_share is the fraction of the game's duration spent in that bot
+    class's get_action; whatever isn't spent in any bot is controller time."""
+    FIELDS = [
+        'phase', 'game', 'duration', 'turns', 'turns_per_sec',
+        'bot', 'players', 'score', 'deaths', 'death_causes',
+        'exits', 'mean_exit_stamina', 'action_time', 'action_share',
+    ]
+
+    def __init__(self, stream, csv_format=False):
+        self.stream = stream
+        self.writer = csv.DictWriter(stream, self.FIELDS) if csv_format else None
+
+    @classmethod
+    def open(cls, filename):
+        log = cls(open(filename, 'a', newline=''), filename.lower().endswith('.csv'))
+        if log.writer is not None and log.stream.tell() == 0:
+            log.writer.writeheader()
+        return log
+
+    def close(self):
+        self.stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def game(self, phase, number, metrics):
+        for botname, bot in sorted(metrics.bots.items()):
+            row = {
+                'phase': phase,
+                'game': number,
+                'duration': round(metrics.duration, 6),
+                'turns': metrics.turns,
+                'turns_per_sec': round(metrics.turns / metrics.duration, 1),
+                'bot': botname,
+                'players': bot.players,
+                'score': bot.score,
+                'deaths': sum(bot.deaths.values()),
+                'death_causes': bot.deaths,
+                'exits': bot.exits,
+                'mean_exit_stamina': bot.exit_stamina / bot.exits if bot.exits else None,
+                'action_time': round(bot.action_time, 6),
+                'action_share': round(bot.action_time / metrics.duration, 4),
+            }
+            if self.writer is None:
+                self.stream.write(json.dumps(row) + '\n')
+            else:
+                row['death_causes'] = ';'.join(
+                    f"{cause}={count}" for cause, count in sorted(bot.deaths.items())
+                )
+                self.writer.writerow(row)
+        self.stream.flush()
+
+# === Tournament worker processes ===
+
+_worker_bots = {}
+
+def _init_worker(bot_specs, log_suppress, time_budget, room_generator, sandbox):
+    global LOG_SUPPRESS, exception
+    LOG_SUPPRESS = log_suppress
+    if 'error' in LOG_SUPPRESS:
+        exception = lambda *_, **__: None
+    # Workers have no terminal to pause on
+    Ruins.pause_on_death = []
+    Ruins.time_budget = time_budget
+    Ruins.room_generator = room_generator
+    for spec in bot_specs:
+        # Spawned (rather than forked) workers need to import bots again
+        bot_class = load_bot_class(spec)
+        if sandbox is not None and bot_class is not Drunkard:
+            bot_class = sandbox.wrap(bot_class)
+        _worker_bots[spec[0]] = bot_class
+
+def _worker_game(job):
+    bot_names, seed, tablefmt, record_events = job
+    output = io.StringIO()
+    events = EventLog(io.BytesIO()) if record_events else None
+    with contextlib.redirect_stdout(output):
+        report = play_game(
+            [_worker_bots[name] for name in bot_names], seed, tablefmt, events
+        )
+    return report, output.getvalue(), events and events.stream.getvalue()
+
+def read_checkpoint(filename):
+    with open(filename, 'rb') as file:
+        return pickle.load(file)
+
+
 def run_tournament(
     bots,
     game_size=10,
@@ -648,11 +1873,20 @@ def run_tournament(
     required_lead=50,
     max_final_games=500,
     tablefmt='presto',
-    seed=None
+    seed=None,
+    workers=1,
+    events=None,
+    metrics=None,
+    confidence=None,
+    tie_margin=0.5,
+    min_final_games=10,
+    checkpoint=None,
+    checkpoint_every=10,
+    resume=False
 ):
     rand = random.Random(seed)
     def tourneylog(*message, type='tourney', end='', **kwargs):
-        if type in LOG_SUPPRESS:
+        if not log_enabled(type):
             return
         print(f"{MSG_COLORS[type]}[==TOURNAMENT==]", *message, end=(LOG_END+end), **kwargs)
 
@@ -665,23 +1899,68 @@ def run_tournament(
         bot_class.__name__: bot_class
         for bot_class in full_pool
     }
+    classes_by_name = {**bots_by_name, 'Drunkard': Drunkard}
+
+    # Everything that has to match for a checkpoint to be resumed
+    settings = {
+        'seed': seed,
+        'bots': sorted(bots_by_name),
+        'game_size': game_size,
+        'pool_games': pool_games,
+        'required_lead': required_lead,
+        'max_final_games': max_final_games,
+        'confidence': confidence,
+        'tie_margin': tie_margin,
+        'min_final_games': min_final_games,
+        'room_generator': Ruins.room_generator,
+    }
+    saved = None
+    if resume and checkpoint is not None:
+        if os.path.exists(checkpoint):
+            saved = read_checkpoint(checkpoint)
+            for key, value in settings.items():
+                if saved['settings'].get(key) != value:
+                    tourneylog(
+                        f"Checkpoint {checkpoint} is for a different tournament ({key} differs)."
+                        " Exiting.",
+                        type='bad'
+                    )
+                    return
+        else:
+            tourneylog(f"There is no checkpoint at {checkpoint}. Starting from scratch.", type='warning')
+
+    if workers > 1:
+        bot_specs = [bot_spec(bot_class) for bot_class in classes_by_name.values()]
+        sandboxes = {
+            bot_class.sandbox
+            for bot_class in full_pool
+            if issubclass(bot_class, SandboxedAdventurer)
+        }
+        worker_pool = multiprocessing.Pool(
+            workers,
+            initializer=_init_worker,
+            initargs=(
+                bot_specs, LOG_SUPPRESS, Ruins.time_budget, Ruins.room_generator,
+                next(iter(sandboxes), None)
+            )
+        )
+    else:
+        worker_pool = None
 
-    def run_game(bots):
+    def schedule(bots):
+        # Seeds are drawn up front (in the same order a serial run would draw
+        # them) so that games can be played out of process.
         rand.shuffle(bots)
-        game = Ruins(*bots, seed=rand.getrandbits(1337))
-        for player, score in game.run_game(tablefmt=tablefmt):
-            if not isinstance(player.bot, Drunkard):
-                scores[type(player.bot).__name__] += score
+        return list(bots), rand.getrandbits(1337)
 
-    if len(full_pool) > game_size:
-        tourneylog(
-            f"Since there are more than {game_size} bots in the tournament,"
-            " a pool will be run to determine which bots will compete in the final series."
-        )
-        game_counts = {bot.__name__: 0 for bot in full_pool} #TEMP
+    def schedule_pool():
+        """Schedule every pool game: returns (game counts, [(header, bots, seed)])"""
+        # How many pool games each bot is down for, to check every bot plays pool_games
+        game_counts = {bot.__name__: 0 for bot in full_pool}
         carryover = []
+        games = []
         for pool_round in range(pool_games):
-            tourneylog("Starting round", pool_round + 1, "of the pool")
+            header = f"Starting round {pool_round + 1} of the pool"
             rand.shuffle(full_pool)
             pool = carryover
             carryover = []
@@ -689,7 +1968,8 @@ def run_tournament(
                 while len(pool) >= game_size:
                     for b in pool[:game_size]:
                         game_counts[b.__name__] += 1
-                    run_game(pool[:game_size])
+                    games.append((header, *schedule(pool[:game_size])))
+                    header = None
                     pool = pool[game_size:]
                 if bot in pool:
                     carryover.append(bot)
@@ -699,92 +1979,334 @@ def run_tournament(
             while len(carryover) >= game_size:
                 for b in carryover[:game_size]:
                     game_counts[b.__name__] += 1
-                run_game(carryover[:game_size])
+                games.append((header, *schedule(carryover[:game_size])))
+                header = None
                 carryover = carryover[game_size:]
-        tourneylog("Making sure an equal number of games were played by each bot...", type='debug')
-        for botname, count in game_counts.items():
-            tourneylog(
-                botname, 'played', count, 'games.',
-                type=('debug' if count == pool_games else 'warning')
-            )
+        return game_counts, games
 
-        ranked_bots = sorted(scores.items(), key=lambda x: x[1], reverse=True)
-        tourneylog("Results from pool series:", type='pool')
+    def play(games):
+        """Play (header, bots, seed) games, yielding their results in order.
 
-        for line in tabulate(
-            [
-                (botname, score, format(score / pool_games, '.03f'))
-                for botname, score in ranked_bots
-            ],
-            headers=['Bot Class', 'Score', 'Mean Score'],
-            tablefmt='presto'
-        ).splitlines():
-            tourneylog(line, type='pool')
-
-        finalists = [
-            bots_by_name[botname]
-            for botname, _ in ranked_bots[:game_size]
-        ]
-        scores = {
-            bot_class.__name__: 0
-            for bot_class in finalists
-        }
-
-    else:
-        finalists = full_pool
-        if len(finalists) < game_size:
-            tourneylog(
-                "Since there aren't enough bots, remaining slots will be filled in with Drunkards",
-                type='warning'
+        The header (if any) is logged right before the game's own output."""
+        if worker_pool is None:
+            for header, bots, game_seed in games:
+                if header:
+                    tourneylog(header)
+                yield play_game(bots, game_seed, tablefmt, events)
+        else:
+            jobs = [
+                ([bot.__name__ for bot in bots], game_seed, tablefmt, events is not None)
+                for _, bots, game_seed in games
+            ]
+            for (header, _, _), (report, output, game_events) in zip(
+                games, worker_pool.imap(_worker_game, jobs)
+            ):
+                if header:
+                    tourneylog(header)
+                sys.stdout.write(output)
+                if game_events:
+                    events.stream.write(game_events)
+                    events.stream.flush()
+                yield report
+
+    latencies = defaultdict(LatencyHistogram)
+    ipc = {}
+    throughput = {'games': 0, 'turns': 0, 'duration': 0.0}
+
+    def record(report, phase, number):
+        throughput['games'] += 1
+        throughput['turns'] += report.metrics.turns
+        throughput['duration'] += report.metrics.duration
+        if metrics is not None:
+            metrics.game(phase, number, report.metrics)
+        for botname, score in report.scores:
+            scores[botname] += score
+        for botname, histogram in report.latencies.items():
+            latencies[botname].merge(histogram)
+        for botname, stats in report.ipc.items():
+            ipc[botname] = IpcStats(*map(sum, zip(ipc.get(botname, (0, 0.0, 0.0)), stats)))
+
+    def save_checkpoint(phase, rand_state, **state):
+        """Atomically replace the checkpoint with the tournament's state after the
+        most recently recorded game."""
+        temp = checkpoint + '.tmp'
+        with open(temp, 'wb') as file:
+            pickle.dump(
+                {
+                    'settings': settings,
+                    'phase': phase,
+                    'rand': rand_state,
+                    'scores': scores,
+                    'latencies': dict(latencies),
+                    'ipc': ipc,
+                    'throughput': throughput,
+                    # Games played after the checkpoint are cut from the logs on resume
+                    'events': events.stream.tell() if events is not None else None,
+                    'metrics': metrics.stream.tell() if metrics is not None else None,
+                    **state
+                },
+                file
             )
-            while len(finalists) < game_size:
-                finalists.append(Drunkard)
+        os.replace(temp, checkpoint)
+
+    phase = None
+    if saved is not None:
+        phase = saved['phase']
+        rand.setstate(saved['rand'])
+        scores = saved['scores']
+        latencies.update(saved['latencies'])
+        ipc.update(saved['ipc'])
+        throughput.update(saved['throughput'])
+        if events is not None and saved['events'] is not None:
+            events.stream.truncate(saved['events'])
+        if metrics is not None and saved['metrics'] is not None:
+            metrics.stream.truncate(saved['metrics'])
+        tourneylog(f"Resuming the tournament from {checkpoint}.")
+
+    # The checkpoint is only removed once the tournament is over (however it
+    # ends), not if it's interrupted
+    finished = False
+    try:
+        if phase == 'final':
+            finalists = [classes_by_name[botname] for botname in saved['finalists']]
+
+        elif len(full_pool) > game_size:
+            if phase == 'pool':
+                game_counts = saved['game_counts']
+                games = [
+                    (header, [classes_by_name[botname] for botname in names], game_seed)
+                    for header, names, game_seed in saved['games']
+                ]
+                pool_game = saved['pool_game']
+            else:
+                tourneylog(
+                    f"Since there are more than {game_size} bots in the tournament,"
+                    " a pool will be run to determine which bots will compete in the final series."
+                )
+                game_counts, games = schedule_pool()
+                pool_game = 0
+            # The whole pool is scheduled up front, so the schedule itself is
+            # what gets checkpointed
+            saved_games = [
+                (header, [bot.__name__ for bot in bots], game_seed)
+                for header, bots, game_seed in games
+            ]
+            for report in play(games[pool_game:]):
+                pool_game += 1
+                record(report, 'pool', pool_game)
+                if checkpoint is not None and pool_game % checkpoint_every == 0:
+                    save_checkpoint(
+                        'pool',
+                        rand.getstate(),
+                        game_counts=game_counts,
+                        games=saved_games,
+                        pool_game=pool_game
+                    )
+            tourneylog("Making sure an equal number of games were played by each bot...", type='debug')
+            for botname, count in game_counts.items():
+                tourneylog(
+                    botname, 'played', count, 'games.',
+                    type=('debug' if count == pool_games else 'warning')
+                )
 
-    finalist_game = 0
-    while True:
-        finalist_game += 1
-        tourneylog(f"Starting game {finalist_game} of the final round.")
-        run_game(finalists)
-        if finalist_game >= max_final_games:
-            tourneylog("Maximum number of finalist games run!", type='warning')
-            break
-        if len(scores) < 2:
-            tourneylog("There aren't enough competitors. Exiting.", type='bad')
-            return
-        first, second = heapq.nlargest(2, scores.values())
-        if first - second >= required_lead:
-            tourneylog(
-                f"The first place bot has achieved a {first - second} point lead over the"
-                " second place bot!"
-            )
-            break
+            ranked_bots = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+            tourneylog("Results from pool series:", type='pool')
+
+            if log_enabled('pool'):
+                for line in tabulate(
+                    [
+                        (botname, score, format(score / pool_games, '.03f'))
+                        for botname, score in ranked_bots
+                    ],
+                    headers=['Bot Class', 'Score', 'Mean Score'],
+                    tablefmt='presto'
+                ).splitlines():
+                    tourneylog(line, type='pool')
+
+            finalists = [
+                bots_by_name[botname]
+                for botname, _ in ranked_bots[:game_size]
+            ]
+            scores = {
+                bot_class.__name__: 0
+                for bot_class in finalists
+            }
+
+        else:
+            finalists = full_pool
+            if len(finalists) < game_size:
+                tourneylog(
+                    "Since there aren't enough bots, remaining slots will be filled in with Drunkards",
+                    type='warning'
+                )
+                while len(finalists) < game_size:
+                    finalists.append(Drunkard)
+
+        # With a confidence level, the series stops as soon as the top two
+        # bots are statistically separated (or statistically tied) instead of
+        # waiting for a fixed point lead.
+        if phase == 'final':
+            lead_test = saved['lead_test']
+            finalist_game = saved['finalist_game']
+        else:
+            lead_test = LeadTest(confidence) if confidence is not None else None
+            finalist_game = 0
+
+        def final_round():
+            """Yield (report, bots, tournament rand state after scheduling) per game.
+
+            With workers, finals are dispatched in speculative batches; any
+            results past the stopping point are simply never consumed."""
+            game_number = finalist_game
+            while True:
+                batch = []
+                rand_states = []
+                for _ in range(max(1, min(workers, max_final_games - game_number))):
+                    game_number += 1
+                    batch.append((
+                        f"Starting game {game_number} of the final round.",
+                        *schedule(finalists)
+                    ))
+                    rand_states.append(rand.getstate())
+                for report, (_, bots, _), rand_state in zip(play(batch), batch, rand_states):
+                    yield report, bots, rand_state
+
+        for report, bots, rand_state in final_round():
+            finalist_game += 1
+            record(report, 'final', finalist_game)
+            if lead_test is not None:
+                lead_test.add(report.scores)
+            if finalist_game >= max_final_games:
+                tourneylog("Maximum number of finalist games run!", type='warning')
+                break
+            if len(scores) < 2:
+                tourneylog("There aren't enough competitors. Exiting.", type='bad')
+                finished = True
+                return
+            if lead_test is None:
+                first, second = heapq.nlargest(2, scores.values())
+                if first - second >= required_lead:
+                    tourneylog(
+                        f"The first place bot has achieved a {first - second} point lead over the"
+                        " second place bot!"
+                    )
+                    break
+            elif finalist_game >= min_final_games:
+                first, second = heapq.nlargest(2, scores, key=scores.get)
+                low, high = lead_test.interval(first, second)
+                if low > 0:
+                    tourneylog(
+                        f"{first} leads {second} by {low:.3f} to {high:.3f} points per game"
+                        f" with {confidence:.1%} confidence!"
+                    )
+                    break
+                if high < tie_margin:
+                    tourneylog(
+                        f"{first} and {second} are tied within {tie_margin} points per game"
+                        f" with {confidence:.1%} confidence.",
+                        type='warning'
+                    )
+                    break
+            if checkpoint is not None and finalist_game % checkpoint_every == 0:
+                # (Finalists are shuffled in place, so their order is state too)
+                save_checkpoint(
+                    'final',
+                    rand_state,
+                    finalists=[bot.__name__ for bot in bots],
+                    finalist_game=finalist_game,
+                    lead_test=lead_test
+                )
+        finished = True
+    finally:
+        if worker_pool is not None:
+            worker_pool.terminate()
+        if finished and checkpoint is not None and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+
+    if lead_test is not None:
+        tourneylog(
+            f"The final round took {finalist_game} of at most {max_final_games} games"
+            f" ({max_final_games - finalist_game} saved)."
+        )
 
     ranked_bots = sorted(scores.items(), key=lambda x: x[1], reverse=True)
     tourneylog("The tournament has completed successfully!")
-    tourneylog(
-        "Final scores of the finalists:\n"
-        + tabulate(
-            [
-                (botname, score, format(score / finalist_game, '.03f'))
-                for botname, score in ranked_bots
-            ],
-            headers=['Bot Class', 'Score', 'Mean Score'],
-            tablefmt=tablefmt
-        ),
-        type='final'
-    )
+    if log_enabled('final'):
+        tourneylog(
+            "Final scores of the finalists:\n"
+            + tabulate(
+                [
+                    (botname, score, format(score / finalist_game, '.03f'))
+                    for botname, score in ranked_bots
+                ],
+                headers=['Bot Class', 'Score', 'Mean Score'],
+                tablefmt=tablefmt
+            ),
+            type='final'
+        )
 
     tourneylog(f"The winner of the tournament is {ranked_bots[0][0]}!", type='winner')
 
+    if log_enabled('timing'):
+        tourneylog(
+            f"Played {throughput['games']} games ({throughput['turns']} turns) in"
+            f" {throughput['duration']:.3f}s of game time:"
+            f" {throughput['turns'] / throughput['duration']:.1f} turns/s",
+            type='timing'
+        )
+        tourneylog(
+            "Time spent in get_action, by bot:\n"
+            + tabulate(
+                [
+                    (
+                        botname,
+                        histogram.count,
+                        format(histogram.total, '.3f'),
+                        format(histogram.percentile(0.5) * 1000, '.3g'),
+                        format(histogram.percentile(0.99) * 1000, '.3g'),
+                        format(histogram.max * 1000, '.3g'),
+                    )
+                    for botname, histogram in sorted(
+                        latencies.items(), key=lambda x: x[1].total, reverse=True
+                    )
+                ],
+                headers=['Bot Class', 'Calls', 'Total (s)', 'p50 (ms)', 'p99 (ms)', 'Max (ms)'],
+                tablefmt=tablefmt
+            ),
+            type='timing'
+        )
+    if ipc and log_enabled('timing'):
+        tourneylog(
+            "Sandbox overhead, by bot:\n"
+            + tabulate(
+                [
+                    (
+                        botname,
+                        stats.calls,
+                        format(stats.bot_time, '.3f'),
+                        format(stats.round_trip - stats.bot_time, '.3f'),
+                        format((stats.round_trip - stats.bot_time) / stats.calls * 1e6, '.1f'),
+                    )
+                    for botname, stats in sorted(ipc.items())
+                    if stats.calls
+                ],
+                headers=['Bot Class', 'Calls', 'Bot time (s)', 'IPC time (s)', 'IPC per call (us)'],
+                tablefmt=tablefmt
+            ),
+            type='timing'
+        )
+
 # === META - Loading bots ===
 
-def scrape_page(url):
+def scrape_page(url, cache_dir=None):
     try:
-        page = html.fromstring(requests.get(url).text)
+        pages = se_scrape.answer_pages(url, cache_dir)
     except Exception:
         exception("Unable to download bots")
         sys.exit(2)
-    for answer in page.xpath("//div[@class='answer']"):
+    for answer in itertools.chain.from_iterable(
+        page.xpath("//div[@class='answer']") for page in pages
+    ):
         try:
             headers = answer.xpath(".//h1")
             title = headers[0].text_content()
@@ -804,22 +2326,155 @@ def sanitize(name):
     else:
         return name
 
-def download_bots(url, bot_dir):
-    for code, title, user in scrape_page(url):
+def download_bots(url, bot_dir, cache_dir=None):
+    for code, title, user in scrape_page(url, cache_dir):
         try:
             module_file = f"{sanitize(user).lower()}__{sanitize(title).lower()}.py"
             if not module_file[0].isalpha():
                 module_file = 'a__' + module_file
-            with open(os.path.join(bot_dir, module_file), 'w') as f:
-                f.write(
-                    f"'''{title}\nby {user}\n'''\n"
-                    "from __main__ import Adventurer\n"
-                    "print = lambda *_, **__: None\n\n"
-                )
-                f.write(code)
+            source = (
+                f"'''{title}\nby {user}\n'''\n"
+                "from __main__ import Adventurer\n"
+                "print = lambda *_, **__: None\n\n"
+                + code
+            )
+            path = os.path.join(bot_dir, module_file)
+            try:
+                with open(path) as f:
+                    if f.read() == source:
+                        # Leave it be, so the bot manifest knows it's unchanged
+                        continue
+            except OSError:
+                pass
+            with open(path, 'w') as f:
+                f.write(source)
         except Exception:
             exception()
 
+
+# Bot modules are imported under their own names, so that one named like a
+# module that's already imported (random.py, say) isn't mistaken for it
+BOT_MODULE_PREFIX = 'ruinsbot_'
+
+def import_bot_module(modname, path):
+    """The module at path, imported (as BOT_MODULE_PREFIX + modname) unless
+    it already has been. A module imported from path under modname itself
+    (like __main__) is used as is."""
+    module = sys.modules.get(modname)
+    if (    module is not None
+            and getattr(module, '__file__', None)
+            and os.path.abspath(module.__file__) == os.path.abspath(path)):
+        return module
+    if not modname.startswith(BOT_MODULE_PREFIX):
+        modname = BOT_MODULE_PREFIX + modname
+    module = sys.modules.get(modname)
+    if module is None:
+        module_spec = importlib.util.spec_from_file_location(modname, path)
+        module = importlib.util.module_from_spec(module_spec)
+        sys.modules[modname] = module
+        try:
+            module_spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[modname]
+            raise
+    return module
+
+
+class LazyAdventurer(Adventurer):
+    """Stand-in for a bot class that hasn't been imported (yet).
+
+    Instantiating it imports the real class and returns an instance of that,
+    but when games are played in other processes it never needs to be."""
+    spec = None
+
+    def __new__(cls, *args, **kwargs):
+        return load_bot_class(cls.spec)(*args, **kwargs)
+
+
+BOT_MANIFEST = '.ruins_manifest.json'
+BotLoadStats = namedtuple('BotLoadStats', ['modules', 'imported', 'seconds'])
+
+def load_bots(bot_dir, needed=None, lazy=False):
+    """Find the bot classes in bot_dir, importing as little as possible.
+
+    A manifest in bot_dir records which Adventurer subclasses each module
+    defines, keyed on the module's mtime and size (and failing those, a hash
+    of its contents). Modules that are new, changed or failed to import last
+    time are always imported to find out what's in them. Of the rest, only
+    modules defining a class in needed (a set of class names, or None for
+    all of them) are imported, and with lazy, not even those: their classes
+    are LazyAdventurer stand-ins.
+
+    Returns (bot classes, BotLoadStats)."""
+    start = time.perf_counter()
+    manifest_file = os.path.join(bot_dir, BOT_MANIFEST)
+    try:
+        with open(manifest_file) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+
+    bot_classes = []
+    new_manifest = {}
+    imported = 0
+    for finder, name, ispkg in pkgutil.walk_packages([os.path.abspath(bot_dir)]):
+        if ispkg:
+            continue
+        path = finder.find_spec(name).origin
+        stat = os.stat(path)
+        entry = manifest.get(name)
+        if (    entry is None
+                or entry['path'] != path
+                or (entry['mtime'], entry['size']) != (stat.st_mtime_ns, stat.st_size)):
+            # New or touched (but not necessarily changed)
+            with open(path, 'rb') as f:
+                digest = hashlib.sha1(f.read()).hexdigest()
+            if entry is None or entry['path'] != path or entry['sha1'] != digest:
+                entry = {'path': path, 'sha1': digest, 'classes': None}
+            entry = {**entry, 'mtime': stat.st_mtime_ns, 'size': stat.st_size}
+        if entry['classes'] is not None and (
+            lazy or (needed is not None and needed.isdisjoint(entry['classes']))
+        ):
+            new_manifest[name] = entry
+            for classname in entry['classes']:
+                if needed is None or classname in needed:
+                    bot_classes.append(type(
+                        classname,
+                        (LazyAdventurer,),
+                        {'spec': (classname, name, path), '__module__': name}
+                    ))
+            continue
+
+        new_manifest[name] = entry
+        imported += 1
+        try:
+            module = import_bot_module(name, path)
+        except:
+            exception("Recovering from error in import")
+            continue
+        # Keyed on the class's own name, so aliases (Bar = Foo) count once
+        # and a bot is called the same whether it's imported here or not
+        module_classes = {
+            obj.__name__: obj for obj in vars(module).values()
+            if (    obj is not Adventurer
+                    and isinstance(obj, type)
+                    and issubclass(obj, Adventurer))
+        }
+        entry['classes'] = list(module_classes)
+        bot_classes.extend(
+            obj for classname, obj in module_classes.items()
+            if needed is None or classname in needed
+        )
+
+    if new_manifest != manifest:
+        try:
+            with open(manifest_file + '.tmp', 'w') as f:
+                json.dump(new_manifest, f, indent=1)
+            os.replace(manifest_file + '.tmp', manifest_file)
+        except OSError:
+            pass
+    return bot_classes, BotLoadStats(len(new_manifest), imported, time.perf_counter() - start)
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
 
@@ -829,22 +2484,54 @@ if __name__ == '__main__':
     )
     parser.add_argument(
         '-r', '--replay',
-        help="Run from a replay file."
+        help="Run from a replay file. Event logs (see --event-log) are replayed without"
+        " loading any bots."
+    )
+    parser.add_argument(
+        '-g', '--game',
+        type=int,
+        metavar='N',
+        help="Only replay the Nth game of an event log."
+    )
+    parser.add_argument(
+        '-e', '--event-log',
+        metavar='FILE',
+        help="Append a binary log of every game's events to FILE."
     )
 
+    parser.add_argument(
+        '-m', '--metrics',
+        metavar='FILE',
+        help="Append per-game tournament metrics (durations, turns, death causes,"
+        " time spent in bots...) to this file, as CSV if it ends with .csv and"
+        " JSON lines otherwise."
+    )
     parser.add_argument(
         '-d',
         '--bot-dir',
         default='ruins_bots'
     )
-    if requests and html:
+    parser.add_argument(
+        '-b', '--bots',
+        nargs='+',
+        metavar='CLASS',
+        help="Only use these bot classes (and only import the modules defining them)."
+    )
+    if se_scrape:
         parser.add_argument(
             '--url',
             help="Scrape bot code from StackExchange first"
         )
+        parser.add_argument(
+            '--cache-dir',
+            default=se_scrape.DEFAULT_CACHE_DIR,
+            help="Where to cache scraped pages, so unchanged pages aren't downloaded again."
+            f" (Default: {se_scrape.DEFAULT_CACHE_DIR})"
+        )
     else:
         parser.set_defaults(
-            url=None
+            url=None,
+            cache_dir=None
         )
     parser.add_argument(
         '-1', '--single',
@@ -869,6 +2556,100 @@ if __name__ == '__main__':
         help="Pause the controller when an adventurer dies. You may also specify a colon-separated list of class names to match against."
     )
 
+    parser.add_argument(
+        '-t', '--time-limit',
+        type=float,
+        metavar='SECONDS',
+        help="Kill bots that take longer than this to choose an action."
+    )
+    parser.add_argument(
+        '--cpu-limit',
+        type=float,
+        metavar='SECONDS',
+        help="Kill bots that use more CPU time than this to choose an action."
+    )
+    parser.add_argument(
+        '--game-time-limit',
+        type=float,
+        metavar='SECONDS',
+        help="Kill bots once their actions have taken this long in total during a game."
+    )
+    parser.add_argument(
+        '--game-cpu-limit',
+        type=float,
+        metavar='SECONDS',
+        help="Kill bots once their actions have used this much CPU time in total during a game."
+    )
+    parser.add_argument(
+        '--sandbox',
+        action='store_true',
+        help="Run each bot class in its own worker process, so that crashing or"
+        " misbehaving bots can't take down the controller."
+    )
+    parser.add_argument(
+        '--memory-limit',
+        type=int,
+        metavar='MB',
+        help="With --sandbox, limit each bot worker's address space to this many megabytes."
+    )
+    parser.add_argument(
+        '--sandbox-worker',
+        nargs=4,
+        help=argparse.SUPPRESS
+    )
+    parser.add_argument(
+        '-j', '--workers',
+        nargs='?',
+        metavar='N',
+        type=int,
+        const=os.cpu_count(),
+        default=1,
+        help="Play tournament games in N worker processes (all CPUs if N is omitted)."
+        " Results are identical to a serial run with the same seed."
+    )
+
+    parser.add_argument(
+        '-c', '--confidence',
+        type=float,
+        metavar='P',
+        help="End the final round once the top two bots are separated (or tied) at this"
+        " confidence level, e.g. 0.99, instead of requiring a fixed point lead."
+    )
+    parser.add_argument(
+        '--tie-margin',
+        type=float,
+        default=0.5,
+        metavar='POINTS',
+        help="With --confidence, the per-game score difference below which the top two"
+        " bots are considered tied."
+    )
+    parser.add_argument(
+        '--room-generator',
+        choices=['exact', 'numpy'],
+        default='exact',
+        help="How rooms are generated. 'numpy' is faster, but the same seed gives"
+        " different rooms than 'exact'. (Default: exact)"
+    )
+    parser.add_argument(
+        '--checkpoint',
+        metavar='FILE',
+        help="Periodically save the tournament's progress to this file."
+        " It is removed once the tournament completes."
+    )
+    parser.add_argument(
+        '--checkpoint-every',
+        type=int,
+        default=10,
+        metavar='N',
+        help="Save a checkpoint after every N games. (Default: 10)"
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help="Continue the tournament saved in the --checkpoint file (if there is one)."
+        " The results are the same as if it had never been interrupted."
+    )
+
     logmodes = parser.add_mutually_exclusive_group()
     logmodes.add_argument(
         '--debug',
@@ -880,6 +2661,12 @@ if __name__ == '__main__':
         action='store_true',
         help="Suppress all log messages except score"
     )
+    logmodes.add_argument(
+        '--headless',
+        action='store_true',
+        help="Suppress every per-game message (including score tables) and only report"
+        " tournament results. Fastest for bulk runs."
+    )
     logmodes.add_argument(
         '-q', '--quiet',
         action='store_true',
@@ -903,10 +2690,28 @@ if __name__ == '__main__':
 
     args = parser.parse_args()
 
+    if args.sandbox_worker:
+        sandbox_worker(*args.sandbox_worker)
+        sys.exit()
+
     if args.debug and args.suppress:
         parser.error("Cannot pass --suppress and --debug together.")
     if args.only and args.suppress:
         parser.error("Cannot pass --suppress and --only together.")
+    if args.confidence is not None and not 0.5 < args.confidence < 1:
+        parser.error("--confidence must be between 0.5 and 1.")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1.")
+    if args.room_generator == 'numpy' and numpy is None:
+        parser.error("--room-generator numpy requires NumPy.")
+    if args.resume and not args.checkpoint:
+        parser.error("--resume requires --checkpoint.")
+    if args.checkpoint_every < 1:
+        parser.error("--checkpoint-every must be at least 1.")
+    if args.memory_limit and not args.sandbox:
+        parser.error("--memory-limit requires --sandbox.")
+    if args.workers > 1 and args.pause_on_death:
+        parser.error("Cannot pass --pause-on-death and --workers together.")
 
     if args.score_only:
         LOG_SUPPRESS = MSG_TYPES
@@ -914,6 +2719,8 @@ if __name__ == '__main__':
             LOG_SUPPRESS.discard('score')
         else:
             LOG_SUPPRESS.discard('final')
+    elif args.headless:
+        LOG_SUPPRESS = MSG_TYPES - {'final', 'winner', 'timing', 'warning', 'error'}
     elif args.quiet:
         LOG_SUPPRESS |= {'minor', 'good', 'info'}
         if not args.single:
@@ -923,6 +2730,9 @@ if __name__ == '__main__':
 
     if not args.debug:
         LOG_SUPPRESS.add('debug')
+        # Timing reports are diagnostics, so only shown when asked for
+        if not (args.headless or args.metrics or args.only):
+            LOG_SUPPRESS.add('timing')
 
     LOG_SUPPRESS.update(args.suppress)
     if 'error' in LOG_SUPPRESS:
@@ -930,36 +2740,81 @@ if __name__ == '__main__':
 
     if args.url:
         os.makedirs(args.bot_dir, exist_ok=True)
-        download_bots(args.url, args.bot_dir)
-
-    bot_classes = []
-    if os.path.isdir(args.bot_dir):
-        for finder, name, ispkg in pkgutil.walk_packages([os.path.abspath(args.bot_dir)]):
-            if ispkg:
-                continue
-            try:
-                module = finder.find_module(name).load_module(name)
-            except:
-                exception("Recovering from error in import")
-            else:
-                for obj in vars(module).values():
-                    if (    obj is not Adventurer
-                            and isinstance(obj, type)
-                            and issubclass(obj, Adventurer)):
-                        bot_classes.append(obj)
+        download_bots(args.url, args.bot_dir, args.cache_dir)
 
-    Ruins.pause_on_death = args.pause_on_death
+    event_replay = args.replay and is_event_log(args.replay)
 
-    if args.replay:
-        Ruins.from_replay(args.replay, [*bot_classes, Drunkard]).run_game()
-    else:
-        if args.seed is None:
-            args.seed = ''.join(
-                random.choice('0123456789ABCDEFGHJKLMNPQRSTVWXY') for _ in range(8)
+    bot_classes = []
+    if os.path.isdir(args.bot_dir) and not event_replay:
+        needed = set(args.bots) if args.bots else None
+        if args.replay:
+            needed = set(Ruins.read_replay(args.replay)[0])
+        # When games are played in other processes, the controller only
+        # needs the names of the bot classes
+        bot_classes, load_stats = load_bots(
+            args.bot_dir, needed, lazy=(args.workers > 1 or args.sandbox)
+        )
+        # (Diagnostic, so only shown when asked for)
+        if args.debug or (args.only and 'timing' in args.only):
+            print(
+                f"{MSG_COLORS['timing']}Found {len(bot_classes)} bot classes in"
+                f" {load_stats.modules} modules ({load_stats.imported} imported)"
+                f" in {load_stats.seconds:.3f}s{CLEAR_COLOR}"
             )
-            print(f"Seed: {MSG_COLORS['seed']}{args.seed}{CLEAR_COLOR}")
+        if args.bots:
+            missing = set(args.bots) - {bot_class.__name__ for bot_class in bot_classes}
+            if missing:
+                parser.error(f"No such bot classes: {', '.join(sorted(missing))}")
 
-        if args.single:
-            Ruins(*bot_classes, seed=args.seed).run_game(tablefmt=args.tablefmt)
+    Ruins.pause_on_death = args.pause_on_death
+    Ruins.room_generator = args.room_generator
+    time_budget = TimeBudget(
+        args.time_limit, args.cpu_limit, args.game_time_limit, args.game_cpu_limit
+    )
+    if any(limit is not None for limit in time_budget):
+        Ruins.time_budget = time_budget
+
+    sandbox = None
+    if args.sandbox:
+        sandbox = BotSandbox(args.memory_limit and args.memory_limit * 2**20)
+        bot_classes = [sandbox.wrap(bot_class) for bot_class in bot_classes]
+
+    with sandbox or contextlib.nullcontext():
+        if event_replay:
+            replay_event_log(args.replay, tablefmt=args.tablefmt, game_number=args.game)
+        elif args.replay:
+            Ruins.from_replay(args.replay, [*bot_classes, Drunkard]).run_game()
         else:
-            run_tournament(bot_classes, tablefmt=args.tablefmt, seed=args.seed)
+            if args.seed is None and args.resume and os.path.exists(args.checkpoint):
+                args.seed = read_checkpoint(args.checkpoint)['settings']['seed']
+            if args.seed is None:
+                args.seed = ''.join(
+                    random.choice('0123456789ABCDEFGHJKLMNPQRSTVWXY') for _ in range(8)
+                )
+                print(f"Seed: {MSG_COLORS['seed']}{args.seed}{CLEAR_COLOR}")
+
+            with (
+                EventLog.open(args.event_log) if args.event_log
+                else contextlib.nullcontext()
+            ) as events, (
+                MetricsLog.open(args.metrics) if args.metrics
+                else contextlib.nullcontext()
+            ) as metrics:
+                if args.single:
+                    Ruins(*bot_classes, seed=args.seed, events=events).run_game(
+                        tablefmt=args.tablefmt
+                    )
+                else:
+                    run_tournament(
+                        bot_classes,
+                        tablefmt=args.tablefmt,
+                        seed=args.seed,
+                        workers=args.workers,
+                        events=events,
+                        metrics=metrics,
+                        confidence=args.confidence,
+                        tie_margin=args.tie_margin,
+                        checkpoint=args.checkpoint,
+                        checkpoint_every=args.checkpoint_every,
+                        resume=args.resume
+                    )
@@ -0,0 +1,501 @@
+#!/usr/bin/env python3.7
+"""Benchmarks for the ruins.py game engine.
+
+Run from the repository root: python3 ruins_bench.py [BENCHMARK ...]
+
+The games benchmark can save its results as a baseline and compare later runs
+against one, e.g.
+
+    python3 ruins_bench.py games --save-baseline baseline.json
+    (change things)
+    python3 ruins_bench.py games --baseline baseline.json
+
+which exits with status 1 if anything got slower (or bigger) than the
+threshold allows. Only runs with the same --games, --repeat and --seed can be
+compared, and rows whose games took a different number of turns are skipped.
+Rates are scaled by a quick calibration run before they're compared, to allow
+for the machine being faster or slower than it was when the baseline was
+saved, but on a busy machine a looser --threshold may still be needed (or a
+new baseline with more --repeat).
+
+ruins_bench_baseline.json is a reference baseline of the default games
+benchmark (its "machine" entry says what it was run on). Calibration only
+goes so far across machines, so for regression checks it's best to save a
+baseline of your own before changing things.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import ruins
+from ruins import Adventurer  # Bots import Adventurer from __main__
+
+TEST_BOTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_bots')
+
+
+def lineups():
+    """The bot classes (cycled through to fill every seat) of each lineup."""
+    test_bots, _ = ruins.load_bots(TEST_BOTS_DIR)
+    return {
+        'drunkards': [ruins.Drunkard],
+        'test_bots': sorted(test_bots, key=lambda bot: bot.__name__) + [ruins.Drunkard],
+    }
+
+
+def calibrate(repeat):
+    """Best time for a fixed bit of pure Python work, as a yardstick for how
+    fast the machine is running right now."""
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rand = ruins.random.Random(0)
+        sorted(rand.randint(1, 1000) for _ in range(20000))
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_games(bots, games, seed, repeat):
+    """Play fixed-seed games to completion (with logging off) repeat times.
+
+    Returns (turns, seconds, peak traced memory in bytes). The time is the sum
+    of each game's best time, which shrugs off noise better than the best
+    time for the whole set. Memory is measured in a separate run of the first
+    game, since tracing it is slow."""
+    best = [math.inf] * games
+    for _ in range(repeat):
+        turns = 0
+        for game_number in range(games):
+            start = time.perf_counter()
+            game = ruins.Ruins(*bots, seed=f"{seed}-{game_number}")
+            game.run_game()
+            best[game_number] = min(best[game_number], time.perf_counter() - start)
+            turns += game.turn_number
+
+    tracemalloc.start()
+    try:
+        ruins.Ruins(*bots, seed=f"{seed}-0").run_game()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return turns, sum(best), peak
+
+
+def machine():
+    """What the benchmarks are running on, to save with a baseline."""
+    processor = platform.processor() or platform.machine()
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                if line.startswith('model name'):
+                    processor = line.split(':', 1)[1].strip()
+                    break
+    except OSError:
+        pass
+    return {
+        'platform': platform.platform(),
+        'processor': processor,
+        'cpus': os.cpu_count(),
+        'python': f"{platform.python_implementation()} {platform.python_version()}",
+        'saved': time.strftime('%Y-%m-%d'),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Rows comparing results to a baseline, and whether anything regressed
+    by more than threshold (a fraction)."""
+    rows = []
+    regressed = False
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if result['turns'] != base['turns']:
+            # The games themselves changed, so the numbers aren't comparable
+            rows.append((
+                key, "", "", "", f"not comparable: turns {base['turns']} -> {result['turns']}"
+            ))
+            continue
+        # Rates are scaled by how fast the machine was running at the time
+        speed = base['calibration'] / result['calibration']
+        changes = []
+        for metric, higher_is_better, scale in [
+            ('games_per_sec', True, speed),
+            ('turns_per_sec', True, speed),
+            ('peak_kib', False, 1),
+        ]:
+            change = result[metric] / scale / base[metric] - 1
+            worse = -change if higher_is_better else change
+            regressed |= worse > threshold
+            changes.append(f"{change:+.1%}" + (" !!" if worse > threshold else ""))
+        rows.append((key, *changes, ""))
+    return rows, regressed
+
+
+def bench_turns(n_players, games, seed):
+    """Play games of Drunkards with logging off, timing only Ruins.turn.
+
+    Returns (turns, player turns, seconds)."""
+    turns = player_turns = 0
+    elapsed = 0.0
+    for game_number in range(games):
+        game = ruins.Ruins(
+            *[ruins.Drunkard] * n_players,
+            seed=f"{seed}-{n_players}-{game_number}"
+        )
+        players = list(game.players.values())
+        start = time.perf_counter()
+        while True:
+            active = sum(player.active for player in players)
+            if not active:
+                break
+            game.turn()
+            player_turns += active
+        elapsed += time.perf_counter() - start
+        turns += game.turn_number
+    return turns, player_turns, elapsed
+
+
+def bench_carry_weight(n_players, games, seed):
+    """Play the same games as bench_turns and, before every turn, look up each
+    active player's carry weight both ways: summing their treasures (as
+    Player.carry_weight used to) and reading the running total Player keeps.
+
+    Returns (lookups, treasures carried over all lookups, seconds summing,
+    seconds reading the running total)."""
+    lookups = carried = 0
+    summed = running = 0.0
+    perf_counter = time.perf_counter
+    for game_number in range(games):
+        game = ruins.Ruins(
+            *[ruins.Drunkard] * n_players,
+            seed=f"{seed}-{n_players}-{game_number}"
+        )
+        players = list(game.players.values())
+        while True:
+            active = [player for player in players if player.active]
+            if not active:
+                break
+            start = perf_counter()
+            for player in active:
+                sum(treasure.weight for treasure in player.treasures)
+            middle = perf_counter()
+            for player in active:
+                player.carry_weight
+            summed += middle - start
+            running += perf_counter() - middle
+            lookups += len(active)
+            carried += sum(len(player.treasures) for player in active)
+            game.turn()
+    return lookups, carried, summed, running
+
+
+def bench_rooms(mode, depth, games, seed):
+    """Generate rooms 1 to depth for a number of games, timing only room
+    generation. 'classic' calls Ruins.generate_room once per room; 'exact' and
+    'numpy' use Ruins.generate_rooms with that room generator.
+
+    Returns (rooms, treasures, seconds)."""
+    rooms = treasures = 0
+    elapsed = 0.0
+    for game_number in range(games):
+        ruins.Ruins.room_generator = 'exact' if mode == 'classic' else mode
+        game = ruins.Ruins(ruins.Drunkard, seed=f"{seed}-rooms-{game_number}")
+        start = time.perf_counter()
+        if mode == 'classic':
+            generated = [game.generate_room(room) for room in range(1, depth + 1)]
+        else:
+            generated = game.generate_rooms(1, depth)[:depth]
+        elapsed += time.perf_counter() - start
+        rooms += len(generated)
+        treasures += sum(map(len, generated))
+    ruins.Ruins.room_generator = 'exact'
+    return rooms, treasures, elapsed
+
+
+BENCH_BOT = '''"""Benchmark bot #{number}"""
+import collections
+import itertools
+from ruins import Adventurer
+
+
+class BenchBot{number}(Adventurer):
+    def enter_ruins(self):
+        self.seen = collections.Counter()
+
+    def get_action(self, state):
+        self.seen[state.room] += 1
+        if state.stamina < 40 + {number} % 7 * 5:
+            return 'previous'
+        best = max(
+            itertools.chain([None], range(len(state.treasures))),
+            key=lambda i: -1 if i is None else state.treasures[i].value / state.treasures[i].weight
+        )
+        if best is not None and state.inventory.carry_weight + state.treasures[best].weight < 50:
+            return 'take', best, state.treasures[best].weight
+        return 'next'
+'''
+
+def bench_startup(n_modules, repeats):
+    """Time ruins.load_bots on a directory of n_modules generated bots: with no
+    manifest, with a manifest (importing everything, one bot's module, or
+    nothing at all).
+
+    Returns [(scenario, classes found, modules imported, seconds)]."""
+    results = []
+    with tempfile.TemporaryDirectory() as bot_dir:
+        for number in range(n_modules):
+            with open(os.path.join(bot_dir, f"bench_bot_{number:03}.py"), 'w') as f:
+                f.write(BENCH_BOT.format(number=number))
+        scenarios = [
+            ('no manifest', None, False),
+            ('all bots', None, False),
+            ('one bot', {'BenchBot0'}, False),
+            ('lazy (-j/--sandbox)', None, True),
+        ]
+        for scenario, needed, lazy in scenarios:
+            elapsed = 0.0
+            for _ in range(repeats):
+                manifest = os.path.join(bot_dir, ruins.BOT_MANIFEST)
+                if scenario == 'no manifest' and os.path.exists(manifest):
+                    os.remove(manifest)
+                for modname in [
+                    name for name in sys.modules
+                    if name.startswith(ruins.BOT_MODULE_PREFIX + 'bench_bot_')
+                ]:
+                    del sys.modules[modname]
+                bot_classes, stats = ruins.load_bots(bot_dir, needed, lazy)
+                elapsed += stats.seconds
+            results.append((scenario, len(bot_classes), stats.imported, elapsed / repeats))
+    return results
+
+
+def run_games_benchmark(args):
+    # Only runs with the same settings play the same games the same number of
+    # times, so a baseline saved with others can't be compared against
+    settings = {'games': args.games, 'repeat': args.repeat, 'seed': args.seed}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('settings') != settings:
+            print(
+                f"{args.baseline} was saved with {baseline.get('settings', 'unknown settings')},"
+                f" not {settings}, so it can't be compared against.",
+                file=sys.stderr
+            )
+            return False
+
+    results = {}
+    rows = []
+    for lineup, classes in lineups().items():
+        for n_players in args.players:
+            bots = [classes[i % len(classes)] for i in range(n_players)]
+            turns, elapsed, peak = bench_games(
+                bots, args.games, f"{args.seed}-{lineup}-{n_players}", args.repeat
+            )
+            key = f"{lineup}/{n_players}"
+            results[key] = {
+                'calibration': calibrate(args.repeat),
+                'turns': turns,
+                'games_per_sec': args.games / elapsed,
+                'turns_per_sec': turns / elapsed,
+                'peak_kib': peak / 1024,
+            }
+            rows.append((
+                lineup,
+                n_players,
+                turns,
+                format(args.games / elapsed, '.1f'),
+                format(turns / elapsed, '.0f'),
+                format(peak / 1024, '.0f'),
+            ))
+    print(ruins.tabulate(
+        rows,
+        headers=['Lineup', 'Players', 'Turns', 'Games/s', 'Turns/s', 'Peak KiB'],
+        tablefmt='presto'
+    ))
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump({**results, 'settings': settings, 'machine': machine()}, f, indent=1)
+    if args.baseline:
+        rows, regressed = compare(results, baseline, args.threshold)
+        print()
+        print(ruins.tabulate(
+            rows,
+            headers=['vs. baseline', 'Games/s', 'Turns/s', 'Peak KiB', 'Note'],
+            tablefmt='presto'
+        ))
+        if regressed:
+            print(f"Regression of more than {args.threshold:.0%} against {args.baseline}!")
+            return False
+    return True
+
+
+def run_turns_benchmark(args):
+    rows = []
+    for n_players in args.players:
+        turns, player_turns, elapsed = bench_turns(n_players, args.games, args.seed)
+        rows.append((
+            n_players,
+            turns,
+            format(turns / elapsed, '.1f'),
+            format(player_turns / elapsed, '.0f'),
+            format(elapsed, '.3f'),
+        ))
+    print(ruins.tabulate(
+        rows,
+        headers=['Players', 'Turns', 'Turns/s', 'Player turns/s', 'Seconds'],
+        tablefmt='presto'
+    ))
+    return True
+
+
+def run_carry_benchmark(args):
+    rows = []
+    for n_players in args.players:
+        lookups, carried, summed, running = bench_carry_weight(n_players, args.games, args.seed)
+        rows.append((
+            n_players,
+            lookups,
+            format(carried / lookups, '.1f'),
+            format(summed / lookups * 1e9, '.0f'),
+            format(running / lookups * 1e9, '.0f'),
+            format(summed / running, '.1f') + 'x',
+        ))
+    print(ruins.tabulate(
+        rows,
+        headers=[
+            'Players', 'Lookups', 'Mean treasures', 'Summed ns', 'Running total ns', 'Speedup'
+        ],
+        tablefmt='presto'
+    ))
+    return True
+
+
+def run_rooms_benchmark(args):
+    rows = []
+    modes = ['classic', 'exact'] + (['numpy'] if ruins.numpy is not None else [])
+    for mode in modes:
+        rooms, treasures, elapsed = bench_rooms(mode, args.rooms, args.games * 20, args.seed)
+        rows.append((
+            mode,
+            rooms,
+            format(rooms / elapsed, '.0f'),
+            format(treasures / elapsed, '.0f'),
+            format(elapsed, '.3f'),
+        ))
+    print(ruins.tabulate(
+        rows,
+        headers=['Room generator', 'Rooms', 'Rooms/s', 'Treasures/s', 'Seconds'],
+        tablefmt='presto'
+    ))
+    return True
+
+
+def run_startup_benchmark(args):
+    print(ruins.tabulate(
+        [
+            (scenario, classes, imported, format(seconds * 1000, '.1f'))
+            for scenario, classes, imported, seconds in bench_startup(args.modules, args.games)
+        ],
+        headers=[f'Loading {args.modules} bots', 'Classes', 'Imported', 'ms'],
+        tablefmt='presto'
+    ))
+    return True
+
+
+BENCHMARKS = {
+    'games': run_games_benchmark,
+    'turns': run_turns_benchmark,
+    'carry': run_carry_benchmark,
+    'rooms': run_rooms_benchmark,
+    'startup': run_startup_benchmark,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        'benchmarks',
+        nargs='*',
+        metavar='BENCHMARK',
+        help=f"Benchmarks to run: {', '.join(BENCHMARKS)} (Default: all of them)"
+    )
+    parser.add_argument(
+        '-p', '--players',
+        nargs='+',
+        type=int,
+        default=[10, 50, 200],
+        help="Player counts to benchmark"
+    )
+    parser.add_argument(
+        '-n', '--games',
+        type=int,
+        default=5,
+        help="Games to play per player count"
+    )
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=5,
+        help="Play each set of games this many times and keep the best time (Default: 5)"
+    )
+    parser.add_argument(
+        '-r', '--rooms',
+        type=int,
+        default=64,
+        help="How deep to generate rooms in the room generation benchmark"
+    )
+    parser.add_argument(
+        '-m', '--modules',
+        type=int,
+        default=100,
+        help="How many bot modules to generate for the startup benchmark"
+    )
+    parser.add_argument(
+        '-s', '--seed',
+        default='bench',
+        help="Seed prefix for the benchmark games"
+    )
+    parser.add_argument(
+        '--save-baseline',
+        metavar='FILE',
+        help="Save the games benchmark's results as a baseline"
+    )
+    parser.add_argument(
+        '--baseline',
+        metavar='FILE',
+        help="Compare the games benchmark's results to a saved baseline"
+    )
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=0.1,
+        help="How much worse than the baseline (as a fraction) counts as a regression"
+        " (Default: 0.1)"
+    )
+    args = parser.parse_args()
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    ruins.LOG_SUPPRESS.update(ruins.MSG_TYPES)
+    ruins.exception = lambda *_, **__: None
+
+    ok = True
+    for number, benchmark in enumerate(args.benchmarks or BENCHMARKS):
+        if number:
+            print()
+        ok &= BENCHMARKS[benchmark](args)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3.7
+"""Cached, concurrent fetching of StackExchange answer pages for the bot scrapers.
+
+Every page of answers is fetched (the pages after the first concurrently, over
+one pooled session), and responses are cached on disk and revalidated with
+ETag/Last-Modified, so rerunning a scraper only downloads what changed.
+
+Run directly to save a question's pages or to serve saved pages locally:
+
+    python3 se_scrape.py save URL DIR
+    python3 se_scrape.py serve DIR [--port PORT]
+"""
+
+import argparse
+import concurrent.futures
+import email.utils
+import hashlib
+import http.server
+import json
+import os
+import urllib.parse
+
+import requests
+import requests.adapters
+from lxml import html
+
+
+DEFAULT_CACHE_DIR = '.se_cache'
+DEFAULT_WORKERS = 4
+PAGINATION_LINKS = (
+    "//div[contains(@class, 'pager-answers') or contains(@class, 's-pagination')]//a/@href"
+)
+
+
+class PageCache:
+    """Pages on disk (one JSON file per URL), with the validators they came with."""
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode()).hexdigest() + '.json')
+
+    def get(self, url):
+        try:
+            with open(self.path(url)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, url, etag, last_modified, text):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.path(url)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(
+                {'url': url, 'etag': etag, 'last_modified': last_modified, 'text': text},
+                f
+            )
+        os.replace(path + '.tmp', path)
+
+
+def fetch(session, url, cache=None):
+    """GET a page's text, revalidating (and refreshing) the cached copy if there is one."""
+    cached = cache.get(url) if cache is not None else None
+    headers = {}
+    if cached is not None:
+        if cached['etag']:
+            headers['If-None-Match'] = cached['etag']
+        if cached['last_modified']:
+            headers['If-Modified-Since'] = cached['last_modified']
+    response = session.get(url, headers=headers, timeout=30)
+    if response.status_code == 304 and cached is not None:
+        return cached['text']
+    response.raise_for_status()
+    if cache is not None:
+        cache.put(
+            url,
+            response.headers.get('ETag'),
+            response.headers.get('Last-Modified'),
+            response.text
+        )
+    return response.text
+
+
+def page_url(url, page):
+    parts = urllib.parse.urlsplit(url)
+    query = dict(urllib.parse.parse_qsl(parts.query))
+    query['page'] = str(page)
+    return urllib.parse.urlunsplit(
+        parts._replace(query=urllib.parse.urlencode(query), fragment='')
+    )
+
+
+def page_count(page):
+    """The number of answer pages, going by a parsed page's pagination links."""
+    pages = [1]
+    for href in page.xpath(PAGINATION_LINKS):
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(href).query)
+        pages += [int(number) for number in query.get('page', []) if number.isdigit()]
+    return max(pages)
+
+
+def answer_pages(url, cache_dir=DEFAULT_CACHE_DIR, workers=DEFAULT_WORKERS):
+    """Every page of answers to the question at url, parsed, in order.
+
+    Pass cache_dir=None to skip the on-disk cache."""
+    cache = PageCache(cache_dir) if cache_dir else None
+    with requests.Session() as session:
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        first = html.fromstring(fetch(session, url, cache))
+        urls = [page_url(url, number) for number in range(2, page_count(first) + 1)]
+        with concurrent.futures.ThreadPoolExecutor(workers) as pool:
+            texts = list(pool.map(lambda page: fetch(session, page, cache), urls))
+    return [first, *map(html.fromstring, texts)]
+
+
+# === Local stand-in for StackExchange ===
+
+def save_pages(url, directory, workers=DEFAULT_WORKERS):
+    """Save every answer page of a question as page-N.html in directory."""
+    os.makedirs(directory, exist_ok=True)
+    for number, page in enumerate(answer_pages(url, None, workers), 1):
+        with open(os.path.join(directory, f"page-{number}.html"), 'wb') as f:
+            f.write(html.tostring(page))
+
+
+class SavedPageHandler(http.server.BaseHTTPRequestHandler):
+    """Serves page-N.html for any path with ?page=N (default 1), with the
+    same ETag/Last-Modified revalidation StackExchange does."""
+    directory = '.'
+
+    def do_GET(self):
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+        number = query.get('page', ['1'])[0]
+        try:
+            with open(os.path.join(self.directory, f"page-{number}.html"), 'rb') as f:
+                body = f.read()
+                mtime = os.fstat(f.fileno()).st_mtime
+        except (OSError, ValueError):
+            self.send_error(404)
+            return
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        last_modified = email.utils.formatdate(mtime, usegmt=True)
+        if (
+            self.headers.get('If-None-Match') == etag
+            or self.headers.get('If-Modified-Since') == last_modified
+        ):
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', last_modified)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve_pages(directory, port=8000):
+    handler = type('Handler', (SavedPageHandler,), {'directory': directory})
+    with http.server.ThreadingHTTPServer(('localhost', port), handler) as server:
+        print(f"Serving {directory} at http://localhost:{server.server_address[1]}/")
+        server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    save = commands.add_parser('save', help="Save every answer page of a question")
+    save.add_argument('url')
+    save.add_argument('directory')
+    serve = commands.add_parser('serve', help="Serve saved pages on localhost")
+    serve.add_argument('directory')
+    serve.add_argument('-p', '--port', type=int, default=8000)
+    args = parser.parse_args()
+
+    if args.command == 'save':
+        save_pages(args.url, args.directory)
+    else:
+        serve_pages(args.directory, args.port)
+
+
+if __name__ == '__main__':
+    main()
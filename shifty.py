@@ -1,15 +1,26 @@
 #!/usr/bin/env python3.7
 
 import argparse
+import copy
 import importlib
+import json
+import mmap
+import multiprocessing
 import random
+import statistics
+import struct
+import time
 try:
     import readline
 except ImportError:
     pass
+from array import array
+from collections import namedtuple
 from dataclasses import dataclass, field
 from typing import List, Union
 
+from harness import clear_timers, set_timers, timers_available
+
 
 @dataclass(frozen=True)
 class CellView:
@@ -134,8 +145,40 @@ class Cell:
         )
 
 
+ALL_WALLS = 0b1111
+# Stored contents: 0 is empty, CACHE is the cache and anything else is that
+# many sunflower seeds
+CACHE = 0xFF
+
+# Maze files: a header of the magic, version, reserved (0), width, height,
+# the cache's cell index (row * width + column) and the entrance's row,
+# column and direction, with (-1, -1, -1) for no entrance. Then the random
+# state (the 625 words of random.Random.getstate(), whether there's a spare
+# gauss value and that value), then the walls and contents, one byte per cell
+# each.
+MAZE_MAGIC = b'SHMZ'
+MAZE_VERSION = 1
+MAZE_HEADER = struct.Struct('<4sHHIIIiii')
+MAZE_RANDOM_STATE = struct.Struct('<625I?d')
+
+
 class Maze:
-    def __init__(self, width, height, *, rand=None):
+    """A maze stored as one byte of wall bits (1 << direction) and one byte of
+    contents per cell, in row-major order.
+
+    Generation is randomized Prim's. With generator='exact', the frontier is
+    a list that walls are popped out of, exactly as the original
+    implementation did, so a seed gives the same maze it always has (the
+    official maze depends on this). With generator='fast', walls are removed
+    from the frontier by swapping in the last one, which is O(1) instead of
+    O(frontier), so large mazes are much faster to generate but different
+    for the same seed.
+    """
+    # 'exact' or 'fast'
+    generator = 'exact'
+
+    def __init__(self, width, height, *, rand=None, generator=None):
+        """Generate a maze (see also Maze.load)."""
         if rand is not None:
             try:
                 self.random = random.Random(rand)
@@ -144,11 +187,13 @@ class Maze:
         else:
             self.random = random.Random()
         randrange = self.random.randrange
-        randint = self.random.randint
-        self.cells = [
-            [Cell() for _ in range(width)]
-            for __ in range(height)
-        ]
+        self.walls = bytearray([ALL_WALLS]) * (width * height)
+        self.contents = bytearray(width * height)
+        # Caches for get_view, keyed by cell index << 2 | direction: each
+        # CellView, and the (forward, left, right) of each Vision. Whatever
+        # changes a cell's walls or contents has to call _changed.
+        self._views = {}
+        self._visions = {}
         self.width = width
         self.height = height
         self.entrance = None
@@ -165,45 +210,214 @@ class Maze:
             cache_r = randrange(h2 - h8, h2 + h8)
         else:
             cache_r = height // 2
-        unvisited = [[True] * width for _ in range(height)]
-        unvisited[cache_r][cache_c] = False
-        self.cells[cache_r][cache_c].contents = 'cache'
+        # (The cache's cell index)
+        self.cache = cache_r * width + cache_c
+        self.contents[self.cache] = CACHE
 
-        def solid(r, c):
-            if 0 <= r < height and 0 <= c < width:
-                return unvisited[r][c]
-            else:
-                return False
-
-        def get_walls(r, c):
-            if solid(r - 1, c):
-                yield r, c, r - 1, c, NORTH
-            if solid(r + 1, c):
-                yield r, c, r + 1, c, SOUTH
-            if solid(r, c - 1):
-                yield r, c, r, c - 1, WEST
-            if solid(r, c + 1):
-                yield r, c, r, c + 1, EAST
-
-        walls = [*get_walls(cache_r, cache_c)]
-        while walls:
-            r1, c1, r2, c2, direction = walls.pop(randrange(len(walls)))
-            if solid(r2, c2):
-                unvisited[r2][c2] = False
-                self.cells[r1][c1].walls[direction] = False
-                self.cells[r2][c2].walls[(direction + 2) % 4] = False
-                walls += get_walls(r2, c2)
+        self._carve(cache_r * width + cache_c, (generator or self.generator) == 'exact')
 
+        contents = self.contents
+        randbelow = self._randbelow()
         for _ in range((width * height) // 10):
             while True:
-                r = randrange(height)
-                c = randrange(width)
-                if self.cells[r][c].contents is None:
+                r = randbelow(height)
+                c = randbelow(width)
+                if not contents[r * width + c]:
                     break
-            self.cells[r][c].contents = randint(3, 5)
+            # randint(3, 5)
+            contents[r * width + c] = 3 + randbelow(3)
 
         self.randomize_entrance()
 
+    def save(self, filename):
+        """Save the maze in the format Maze.load reads.
+
+        The random state goes with it, so a loaded maze moves its entrance
+        around the same way this one would have."""
+        if type(self.random) is not random.Random:
+            raise TypeError("Only mazes using random.Random can be saved.")
+        _, state, gauss = self.random.getstate()
+        with open(filename, 'wb') as f:
+            f.write(MAZE_HEADER.pack(
+                MAZE_MAGIC, MAZE_VERSION, 0, self.width, self.height, self.cache,
+                *(self.entrance or (-1, -1, -1))
+            ))
+            f.write(MAZE_RANDOM_STATE.pack(*state, gauss is not None, gauss or 0.0))
+            f.write(self.walls)
+            f.write(self.contents)
+
+    @classmethod
+    def load(cls, filename):
+        """A maze saved with save, backed by a memory map of the file.
+
+        The map is copy-on-write: the file is never changed, and processes
+        that load the same file share its pages until they change them
+        (which only eating and moving the entrance do)."""
+        with open(filename, 'rb') as f:
+            try:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+            except ValueError:  # Empty
+                raise ValueError(f"{filename} is not a maze file.") from None
+        if len(mapped) < MAZE_HEADER.size or mapped[:4] != MAZE_MAGIC:
+            raise ValueError(f"{filename} is not a maze file.")
+        magic, version, _, width, height, cache, *entrance = MAZE_HEADER.unpack_from(mapped)
+        if version != MAZE_VERSION:
+            raise ValueError(f"{filename} is a version {version} maze file.")
+        start = MAZE_HEADER.size + MAZE_RANDOM_STATE.size
+        cells = width * height
+        if len(mapped) != start + 2 * cells:
+            raise ValueError(f"{filename} is truncated.")
+        *state, has_gauss, gauss = MAZE_RANDOM_STATE.unpack_from(mapped, MAZE_HEADER.size)
+
+        maze = cls.__new__(cls)
+        maze.random = random.Random()
+        maze.random.setstate((3, tuple(state), gauss if has_gauss else None))
+        maze.width = width
+        maze.height = height
+        maze.cache = cache
+        maze.entrance = tuple(entrance) if entrance[0] >= 0 else None
+        maze._mapped = mapped
+        maze.walls = memoryview(mapped)[start:start + cells]
+        maze.contents = memoryview(mapped)[start + cells:start + 2 * cells]
+        maze._views = {}
+        maze._visions = {}
+        return maze
+
+    def _randbelow(self):
+        """randrange(n) for one argument; inlined (this is the same rejection
+        sampling that random.Random does internally) unless rand was
+        something other than a random.Random."""
+        if type(self.random) is not random.Random:
+            return self.random.randrange
+        getrandbits = self.random.getrandbits
+        def randbelow(n):
+            k = n.bit_length()
+            r = getrandbits(k)
+            while r >= n:
+                r = getrandbits(k)
+            return r
+        return randbelow
+
+    def _carve(self, start, exact):
+        """Randomized Prim's from the start cell.
+
+        This works on a copy of the grid with a border of visited cells all
+        the way around, so neighbours don't need bounds checks. Frontier
+        entries are cell << 2 | direction (in padded indices), for the wall on
+        that side of a visited cell, and are added in the same order (north,
+        south, west, east) that the original implementation added them."""
+        width = self.width
+        height = self.height
+        stride = width + 2
+        walls = bytearray([ALL_WALLS]) * (stride * (height + 2))
+        unvisited = bytearray(stride * (height + 2))
+        for r in range(1, height + 1):
+            unvisited[r * stride + 1:r * stride + 1 + width] = bytes([1]) * width
+        offsets = (-stride, 1, stride, -1)
+        # Same as _randbelow, but inlined in the loop
+        inline = type(self.random) is random.Random
+        randrange = self.random.randrange
+        getrandbits = self.random.getrandbits
+        frontier = []
+        push = frontier.append
+        pop = frontier.pop
+
+        r, c = divmod(start, width)
+        cell = (r + 1) * stride + c + 1
+        unvisited[cell] = 0
+        while True:
+            if unvisited[cell - stride]:
+                push(cell << 2 | NORTH)
+            if unvisited[cell + stride]:
+                push(cell << 2 | SOUTH)
+            if unvisited[cell - 1]:
+                push(cell << 2 | WEST)
+            if unvisited[cell + 1]:
+                push(cell << 2 | EAST)
+
+            while frontier:
+                n = len(frontier)
+                if inline:
+                    k = n.bit_length()
+                    index = getrandbits(k)
+                    while index >= n:
+                        index = getrandbits(k)
+                else:
+                    index = randrange(n)
+                if exact:
+                    wall = pop(index)
+                else:
+                    wall = frontier[index]
+                    last = pop()
+                    if index < n - 1:
+                        frontier[index] = last
+                direction = wall & 3
+                cell = (wall >> 2) + offsets[direction]
+                if unvisited[cell]:
+                    unvisited[cell] = 0
+                    walls[wall >> 2] ^= 1 << direction
+                    walls[cell] ^= 1 << ((direction + 2) % 4)
+                    break
+            else:
+                break
+
+        for r in range(height):
+            self.walls[r * width:(r + 1) * width] = walls[(r + 1) * stride + 1:(r + 1) * stride + 1 + width]
+
+    def has_wall(self, r, c, direction):
+        return bool(self.walls[r * self.width + c] >> direction & 1)
+
+    def get_contents(self, r, c):
+        contents = self.contents[r * self.width + c]
+        if contents == CACHE:
+            return 'cache'
+        return contents or None
+
+    def eat(self, r, c):
+        """Eat one of the sunflower seeds in a cell."""
+        index = r * self.width + c
+        if self.contents[index] in (0, CACHE):
+            raise ValueError("Nothing to eat")
+        self.contents[index] -= 1
+        self._changed(r, c)
+
+    def _changed(self, r, c):
+        """Forget the cached views of a cell, and every cached vision that
+        shows it."""
+        width = self.width
+        height = self.height
+        walls = self.walls
+        views = self._views
+        visions = self._visions
+        index = r * width + c
+        for dir in range(4):
+            views.pop(index << 2 | dir, None)
+        for dir in range(4):
+            # Looking in dir, the cell can be seen from anywhere in the
+            # corridor behind it
+            back = (dir + 2) % 4
+            dr, dc = DIRS[back]
+            rr, cc = r, c
+            while True:
+                visions.pop((rr * width + cc) << 2 | dir, None)
+                if walls[rr * width + cc] >> back & 1:
+                    break
+                rr += dr
+                cc += dc
+                if not (0 <= rr < height and 0 <= cc < width):
+                    break
+            # The neighbour on this side sees the cell to its left or right
+            dr, dc = DIRS[dir]
+            if 0 <= r + dr < height and 0 <= c + dc < width:
+                neighbour = (r + dr) * width + c + dc
+                visions.pop(neighbour << 2 | (dir + 1) % 4, None)
+                visions.pop(neighbour << 2 | (dir + 3) % 4, None)
+
+    def cell(self, r, c):
+        """A copy of a cell as a Cell."""
+        bits = self.walls[r * self.width + c]
+        return Cell([bool(bits >> d & 1) for d in range(4)], self.get_contents(r, c))
+
     def __str__(self):
         grid = [
             ['+'] * (self.width * 2 + 1)
@@ -211,55 +425,82 @@ class Maze:
         ]
         for r in range(self.height):
             for c in range(self.width):
-                cell = self.cells[r][c]
+                contents = self.get_contents(r, c)
+                bits = self.walls[r * self.width + c]
                 grid[r*2+1][c*2+1] = (
-                    '  ' if cell.contents is None
-                    else format(str(cell.contents)[:2], '>2')
+                    '  ' if contents is None
+                    else format(str(contents)[:2], '>2')
                 )
-                north, east, south, west = cell.walls
-                grid[r*2][c*2+1] = '--' if north else '  '
-                grid[r*2+2][c*2+1] = '--' if south else '  '
-                grid[r*2+1][c*2] = '|' if west else ' '
-                grid[r*2+1][c*2+2] = '|' if east else ' '
+                grid[r*2][c*2+1] = '--' if bits & 1 << NORTH else '  '
+                grid[r*2+2][c*2+1] = '--' if bits & 1 << SOUTH else '  '
+                grid[r*2+1][c*2] = '|' if bits & 1 << WEST else ' '
+                grid[r*2+1][c*2+2] = '|' if bits & 1 << EAST else ' '
         return '\n'.join([''.join(row) for row in grid])
 
     def randomize_entrance(self):
         if self.entrance:
             r, c, dir = self.entrance
-            self.cells[r][c].walls[dir] = True
+            self.walls[r * self.width + c] |= 1 << dir
+            self._changed(r, c)
 
         def set_entrance(r, c, dir):
             self.entrance = r, c, dir
-            self.cells[r][c].walls[dir] = False
+            self.walls[r * self.width + c] &= ~(1 << dir)
+            self._changed(r, c)
+
+        set_entrance(*self.entrance_at(
+            self.random.randrange(self.width * 2 + self.height * 2)
+        ))
 
-        entrance = self.random.randrange(self.width * 2 + self.height * 2)
+    def entrance_at(self, entrance):
+        """The (r, c, dir) of an entrance, numbered clockwise from the top
+        left corner of the maze, as randomize_entrance draws them."""
         if entrance < self.width:
-            set_entrance(0, entrance, NORTH)
-            return
+            return 0, entrance, NORTH
         else:
             entrance -= self.width
 
         if entrance < self.height:
-            set_entrance(entrance, self.width - 1, EAST)
-            return
+            return entrance, self.width - 1, EAST
         else:
             entrance -= self.height
 
         if entrance < self.width:
-            set_entrance(self.height - 1, entrance, SOUTH)
-            return
+            return self.height - 1, entrance, SOUTH
         else:
             entrance -= self.width
 
         assert entrance < self.height
-        set_entrance(entrance, 0, WEST)
+        return entrance, 0, WEST
+
+    def cell_view(self, r, c, dir):
+        """What a mouse facing dir sees of a cell (None outside the maze)."""
+        if not (0 <= r < self.height and 0 <= c < self.width):
+            return None
+        key = (r * self.width + c) << 2 | dir
+        view = self._views.get(key)
+        if view is None:
+            bits = self.walls[r * self.width + c]
+            view = self._views[key] = CellView(
+                forward=bool(bits >> dir & 1),
+                left=bool(bits >> ((dir + 3) % 4) & 1),
+                right=bool(bits >> ((dir + 1) % 4) & 1),
+                back=bool(bits >> ((dir + 2) % 4) & 1),
+                contents=self.get_contents(r, c)
+            )
+        return view
 
     def get_view(self, r, c, dir):
+        key = (r * self.width + c) << 2 | dir
+        vision = self._visions.get(key)
+        if vision is None:
+            vision = self._visions[key] = self._look(r, c, dir)
+        forward, left, right = vision
+        return Vision(left=left, right=right, forward=list(forward))
+
+    def _look(self, r, c, dir):
         def cell_view(r, c):
-            if 0 <= r < self.height and 0 <= c < self.width:
-                return self.cells[r][c].get_view(dir)
-            else:
-                return None
+            return self.cell_view(r, c, dir)
         fdr, fdc = DIRS[dir]
         rdr, rdc = DIRS[(dir + 1) % 4]
         ldr, ldc = DIRS[(dir + 3) % 4]
@@ -272,53 +513,357 @@ class Maze:
             c += fdc
             curcell = cell_view(r, c)
             forward.append(curcell)
-        return Vision(left=left, right=right, forward=forward)
+        return tuple(forward), left, right
+
+
+class PathOracle:
+    """Shortest possible challenge on a maze, for judging mice against.
+
+    A mouse's state is its (cell, direction), and turning and moving forward
+    both take a turn, so shortest trips are found by breadth-first search
+    over states. Only the entrance ever changes, and it's on the edge, so
+    distances inside the maze are searched once, from the cache cell facing
+    each direction, and every trip (whatever its entrance) is a lookup.
+
+    A trip in through an entrance to the cache cell facing d and back out is
+    the path back out, plus the path in reversed (reversing a path reverses
+    the direction of every state on it), so its length is
+    dist[d][exit] + dist[d + 2][exit], where exit is the entrance cell
+    facing out of the maze.
+    """
+    def __init__(self, maze):
+        self.maze = maze
+        width = maze.width
+        walls = bytearray(maze.walls)
+        if maze.entrance:
+            # Keep the search inside the maze
+            r, c, dir = maze.entrance
+            walls[r * width + c] |= 1 << dir
+        cache = maze.cache
+        self.distances = [
+            self._search(walls, cache << 2 | dir) for dir in range(4)
+        ]
+
+    def _search(self, walls, start):
+        offsets = (-self.maze.width, 1, self.maze.width, -1)
+        dist = array('l', [-1]) * (len(walls) * 4)
+        dist[start] = 0
+        frontier = [start]
+        steps = 0
+        while frontier:
+            steps += 1
+            reached = []
+            push = reached.append
+            for state in frontier:
+                cell = state >> 2
+                dir = state & 3
+                for next_state in (cell << 2 | (dir + 1) & 3, cell << 2 | (dir + 3) & 3):
+                    if dist[next_state] < 0:
+                        dist[next_state] = steps
+                        push(next_state)
+                if not walls[cell] >> dir & 1:
+                    next_state = (cell + offsets[dir]) << 2 | dir
+                    if dist[next_state] < 0:
+                        dist[next_state] = steps
+                        push(next_state)
+            frontier = reached
+        return dist
+
+    def trip_turns(self, entrance):
+        """Fewest turns to fetch a seed through the (r, c, dir) entrance.
+
+        (Leaving the maze doesn't take a turn.)"""
+        r, c, dir = entrance
+        exit = (r * self.maze.width + c) << 2 | dir
+        return min(
+            self.distances[d][exit] + self.distances[(d + 2) % 4][exit]
+            for d in range(4)
+        )
+
+    def challenge_turns(self, cache_size=100):
+        """Fewest turns to fetch cache_size seeds, starting from the maze's
+        current entrance and random state (which are left alone)."""
+        rand = copy.deepcopy(self.maze.random)
+        entrance = self.maze.entrance
+        turns = 0
+        for _ in range(cache_size):
+            turns += self.trip_turns(entrance)
+            entrance = self.maze.entrance_at(
+                rand.randrange(self.maze.width * 2 + self.maze.height * 2)
+            )
+        return turns
 
 
 class InvalidAction(Exception):
     pass
 
 
-def run_challenge(width, height, mouseclass, *, random=None, cache_size=100):
-    maze = Maze(width, height, rand=random)
-    mouse = mouseclass()
+class LimitReached(BaseException):
+    """The challenge went over one of its ChallengeLimits.
+
+    This isn't an Exception so that mice with blanket exception handlers
+    can't swallow it when it's raised from a timer in the middle of
+    get_action."""
+
+
+ChallengeLimits = namedtuple(
+    'ChallengeLimits',
+    ['turns', 'trip_turns', 'seconds', 'trip_seconds'],
+    defaults=(None, None, None, None)
+)
+ChallengeLimits.__doc__ = """Caps (or None) on a challenge's turns and wall
+time, overall and for each trip into the maze for a seed."""
+
+ChallengeOutcome = namedtuple(
+    'ChallengeOutcome', ['turns', 'collected', 'failure', 'mouse_seconds', 'seconds']
+)
+
+
+def play_challenge(maze, mouse, cache_size=100, limits=None):
+    """Have the mouse fetch cache_size seeds from the maze.
+
+    Returns a ChallengeOutcome, where failure is the InvalidAction or
+    LimitReached that ended the challenge early, if any, and mouse_seconds
+    is the part of the time spent in mouse.get_action. Time limits are
+    checked between turns and, where SIGALRM timers are available, also
+    interrupt a mouse that takes too long to choose an action."""
+    limits = limits or ChallengeLimits()
+    timers = (
+        (limits.seconds is not None or limits.trip_seconds is not None)
+        and timers_available()
+    )
+    perf_counter = time.perf_counter
+    start = perf_counter()
     turn = 0
-    for seed in range(cache_size):
-        r, c, dir = maze.entrance
-        dir = (dir + 2) % 4
-        mouse.enter_maze()
-        has_seed = False
-        while True:
-            view = maze.get_view(r, c, dir)
-            action = mouse.get_action(view)
-            if action == 'right':
-                dir = (dir + 1) % 4
-            elif action == 'left':
-                dir = (dir + 3) % 4
-            elif action == 'forward':
-                if view.forward[0].forward:
-                    raise InvalidAction("Cannot move forward through wall.")
-                dr, dc = DIRS[dir]
-                if not (0 <= r + dr < maze.height and 0 <= c + dc < maze.width):
-                    if has_seed:
-                        break
+    mouse_seconds = 0.0
+    failure = None
+    try:
+        for collected in range(cache_size):
+            deadline = reason = None
+            if limits.seconds is not None:
+                deadline = start + limits.seconds
+                reason = f"Took longer than {limits.seconds}s in total."
+            if limits.trip_seconds is not None and (
+                deadline is None or perf_counter() + limits.trip_seconds < deadline
+            ):
+                deadline = perf_counter() + limits.trip_seconds
+                reason = f"Took longer than {limits.trip_seconds}s to fetch a seed."
+            if timers:
+                previous = set_timers(
+                    deadline - perf_counter(), reason, exception=LimitReached
+                )
+            try:
+                last_turn = None
+                if limits.turns is not None:
+                    last_turn = limits.turns
+                if limits.trip_turns is not None and (
+                    last_turn is None or turn + limits.trip_turns < last_turn
+                ):
+                    last_turn = turn + limits.trip_turns
+
+                r, c, dir = maze.entrance
+                dir = (dir + 2) % 4
+                mouse.enter_maze()
+                has_seed = False
+                while True:
+                    if last_turn is not None and turn >= last_turn:
+                        if limits.turns is not None and turn >= limits.turns:
+                            raise LimitReached(f"Took more than {limits.turns} turns in total.")
+                        raise LimitReached(f"Took more than {limits.trip_turns} turns to fetch a seed.")
+                    if deadline is not None and perf_counter() > deadline:
+                        raise LimitReached(reason)
+                    view = maze.get_view(r, c, dir)
+                    mouse_start = perf_counter()
+                    try:
+                        action = mouse.get_action(view)
+                    finally:
+                        mouse_seconds += perf_counter() - mouse_start
+                    if action == 'right':
+                        dir = (dir + 1) % 4
+                    elif action == 'left':
+                        dir = (dir + 3) % 4
+                    elif action == 'forward':
+                        if view.forward[0].forward:
+                            raise InvalidAction("Cannot move forward through wall.")
+                        dr, dc = DIRS[dir]
+                        if not (0 <= r + dr < maze.height and 0 <= c + dc < maze.width):
+                            if has_seed:
+                                break
+                            else:
+                                raise InvalidAction("Cannot exit maze without seed.")
+                        r += dr
+                        c += dc
+                    elif action == 'eat':
+                        if not isinstance(view.forward[0].contents, int):
+                            raise InvalidAction("Nothing to eat")
+                        maze.eat(r, c)
                     else:
-                        raise InvalidAction("Cannot exit maze without seed.")
-                r += dr
-                c += dc
-            elif action == 'eat':
-                if not isinstance(view.forward[0].contents, int):
-                    raise InvalidAction("Nothing to eat")
-                maze.cells[r][c].contents -= 1
-                if maze.cells[r][c].contents <= 0:
-                    maze.cells[r][c].contents = None
+                        raise InvalidAction(f"Unrecognized action: {action}")
+                    turn += 1
+                    if not has_seed and maze.get_contents(r, c) == 'cache':
+                        has_seed = True
+            finally:
+                # Stop the alarm before leaving the trip, so that it can't go
+                # off anywhere LimitReached wouldn't be caught
+                if timers:
+                    clear_timers(previous)
+            maze.randomize_entrance()
+        else:
+            collected = cache_size
+    except (InvalidAction, LimitReached) as e:
+        failure = e
+    return ChallengeOutcome(turn, collected, failure, mouse_seconds, perf_counter() - start)
+
+
+def run_challenge(
+    width, height, mouseclass, *, random=None, cache_size=100, limits=None,
+    oracle=True, maze_file=None
+):
+    if maze_file is not None:
+        maze = Maze.load(maze_file)
+    else:
+        maze = Maze(width, height, rand=random)
+    optimal = PathOracle(maze).challenge_turns(cache_size) if oracle else None
+    mouse = mouseclass()
+    outcome = play_challenge(maze, mouse, cache_size, limits)
+    if outcome.failure is not None:
+        raise outcome.failure
+    print(f"All seeds collected in {outcome.turns} turns")
+    if optimal is not None:
+        print(
+            f"The fewest possible is {optimal} turns"
+            f" (efficiency {optimal / max(outcome.turns, 1):.1%})"
+        )
+    show_timing(outcome)
+
+
+def show_timing(outcome, show=print):
+    show(
+        f"({outcome.seconds:.2f}s: {outcome.turns / max(outcome.seconds, 1e-9):.0f} turns/s,"
+        f" {outcome.mouse_seconds:.2f}s in the mouse,"
+        f" {outcome.seconds - outcome.mouse_seconds:.2f}s in the controller)"
+    )
+
+
+# === Batch scoring ===
+
+ChallengeResult = namedtuple(
+    'ChallengeResult',
+    [
+        'bot', 'width', 'height', 'seed', 'turns', 'collected', 'failure',
+        'seconds', 'mouse_seconds', 'optimal'
+    ]
+)
+
+
+def maze_seed(seed, number):
+    """The seed of each maze in a batch; every bot gets the same mazes."""
+    return f"{seed}/{number}"
+
+
+def _batch_job(job):
+    mouseclass, width, height, seed, cache_size, generator, limits, oracle, maze_file = job
+    if maze_file is not None:
+        maze = Maze.load(maze_file)
+        width, height, seed = maze.width, maze.height, maze_file
+    else:
+        maze = Maze(width, height, rand=seed, generator=generator)
+    optimal = PathOracle(maze).challenge_turns(cache_size) if oracle else None
+    start = time.perf_counter()
+    try:
+        turns, collected, failure, mouse_seconds, seconds = play_challenge(
+            maze, mouseclass(), cache_size, limits
+        )
+    except (Exception, LimitReached) as e:
+        # A crashing mouse fails its maze rather than the whole batch
+        turns = collected = mouse_seconds = None
+        failure = f"{type(e).__name__}: {e}"
+        seconds = time.perf_counter() - start
+    return ChallengeResult(
+        f"{mouseclass.__module__}.{mouseclass.__qualname__}",
+        width, height, seed, turns, collected,
+        failure and str(failure), seconds, mouse_seconds, optimal
+    )
+
+
+def score_bots(
+    mouseclasses, sizes=((30, 30),), mazes=10, *,
+    seed=None, cache_size=100, workers=1, generator=None, limits=None,
+    oracle=True, maze_files=None
+):
+    """Run every mouse class through the same mazes.
+
+    Each size gets mazes mazes, seeded from seed (random if None), unless
+    maze_files are given, in which case those saved mazes are used instead
+    (and each result's seed is its file). Mouse classes have to be importable
+    for workers > 1. Returns a list of ChallengeResult, one per (maze, mouse)
+    in order, with the PathOracle's fewest possible turns as optimal (unless
+    oracle is false)."""
+    if seed is None:
+        seed = random.getrandbits(64)
+    generator = generator or Maze.generator
+    if maze_files:
+        jobs = [
+            (mouseclass, None, None, None, cache_size, None, limits, oracle, maze_file)
+            for maze_file in maze_files
+            for mouseclass in mouseclasses
+        ]
+    else:
+        jobs = [
+            (
+                mouseclass, width, height, maze_seed(seed, number), cache_size,
+                generator, limits, oracle, None
+            )
+            for width, height in sizes
+            for number in range(mazes)
+            for mouseclass in mouseclasses
+        ]
+    if workers > 1:
+        with multiprocessing.Pool(workers) as pool:
+            return pool.map(_batch_job, jobs)
+    return [_batch_job(job) for job in jobs]
+
+
+def show_scores(results, show=print):
+    """Summarize batch results for each size and mouse, side by side.
+
+    ms/1000 turns is the time taken per 1000 turns, and Controller the part
+    of it spent outside the mouse (in the maze and the challenge loop)."""
+    groups = {}
+    for result in results:
+        groups.setdefault((result.width, result.height), {}).setdefault(result.bot, []).append(result)
+    show(
+        f"{'Size':>9}  {'Bot':<30} {'Mazes':>5} {'Failed':>6} {'Mean turns':>11}"
+        f" {'Best':>8} {'Worst':>8} {'ms/1000 turns':>13} {'Controller':>10} {'In mouse':>8}"
+        f" {'Efficiency':>10}"
+    )
+    for (width, height), bots in groups.items():
+        for bot, runs in bots.items():
+            turns = [run.turns for run in runs if run.failure is None]
+            failed = len(runs) - len(turns)
+            total_turns = sum(run.turns or 0 for run in runs)
+            total_seconds = sum(run.seconds for run in runs)
+            rate = total_seconds / total_turns * 1e6 if total_turns else float('nan')
+            mouse_seconds = sum(run.mouse_seconds or 0 for run in runs)
+            controller_rate = (
+                (total_seconds - mouse_seconds) / total_turns * 1e6
+                if total_turns else float('nan')
+            )
+            in_mouse = mouse_seconds / total_seconds if total_seconds else float('nan')
+            # Fewest possible turns over turns taken, for the mazes finished
+            ratios = [
+                run.optimal / max(run.turns, 1)
+                for run in runs if run.failure is None and run.optimal is not None
+            ]
+            efficiency = f"{statistics.mean(ratios):.1%}" if ratios else '-'
+            if turns:
+                stats = f"{statistics.mean(turns):>11.1f} {min(turns):>8} {max(turns):>8}"
             else:
-                raise InvalidAction(f"Unrecognized action: {action}")
-            turn += 1
-            if not has_seed and maze.cells[r][c].contents == 'cache':
-                has_seed = True
-        maze.randomize_entrance()
-    print(f"All seeds collected in {turn} turns")
+                stats = f"{'-':>11} {'-':>8} {'-':>8}"
+            show(
+                f"{f'{width}x{height}':>9}  {bot:<30} {len(runs):>5} {failed:>6} {stats}"
+                f" {rate:>13.2f} {controller_rate:>10.2f} {in_mouse:>8.1%} {efficiency:>10}"
+            )
 
 
 class InteractiveMouse:
@@ -354,6 +899,14 @@ class InteractiveMouse:
                 return action
 
 
+def maze_size(text):
+    try:
+        width, height = map(int, text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, not {text!r}")
+    return width, height
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='The official "Shifty Maze" code challenge test driver'
@@ -361,8 +914,9 @@ def main():
 
     parser.add_argument(
         'bot_class',
-        nargs='?',
+        nargs='*',
         help="The qualified name of your bot class, including the module name."
+        " (Batches can compare several.)"
     )
 
     parser.add_argument(
@@ -393,15 +947,118 @@ def main():
         action='store_true',
         help="Score the bot on the standard maze"
     )
+    parser.add_argument(
+        '--max-turns',
+        metavar='N',
+        type=int,
+        help="Fail bots that take more than N turns in total."
+    )
+    parser.add_argument(
+        '--max-trip-turns',
+        metavar='N',
+        type=int,
+        help="Fail bots that take more than N turns to fetch any one seed."
+    )
+    parser.add_argument(
+        '-t', '--time-limit',
+        metavar='SECONDS',
+        type=float,
+        help="Fail bots that take longer than this in total."
+    )
+    parser.add_argument(
+        '--trip-time-limit',
+        metavar='SECONDS',
+        type=float,
+        help="Fail bots that take longer than this to fetch any one seed."
+    )
+    parser.add_argument(
+        '--no-oracle',
+        dest='oracle',
+        action='store_false',
+        help="Don't work out the fewest possible turns to compare bots against"
+        " (which takes a while for huge mazes)."
+    )
+    parser.add_argument(
+        '-m', '--maze',
+        metavar='FILE',
+        nargs='+',
+        help="Play on maze(s) saved with --save-maze instead of generating one."
+        " (Only --batch can take several.)"
+    )
+    parser.add_argument(
+        '--save-maze',
+        metavar='FILE',
+        help="Generate the maze (with --size, --seed and --generator), save it"
+        " to FILE and exit."
+    )
+    parser.add_argument(
+        '-b', '--batch',
+        metavar='MAZES',
+        type=int,
+        nargs='?',
+        const=0,
+        help="Score the bots on this many mazes (of each --sizes) without"
+        " showing the game, and summarize how they did. With --maze, leave"
+        " out MAZES: each saved maze is played once."
+    )
+    parser.add_argument(
+        '--sizes',
+        metavar='WxH',
+        nargs='+',
+        type=maze_size,
+        help="Maze sizes for --batch. (Defaults to --size.)"
+    )
+    parser.add_argument(
+        '-j', '--workers',
+        type=int,
+        default=1,
+        help="Play --batch mazes in this many processes."
+    )
+    parser.add_argument(
+        '-o', '--results',
+        metavar='FILE',
+        help="Write every --batch result to FILE, as JSON lines."
+    )
+    parser.add_argument(
+        '-g', '--generator',
+        choices=['exact', 'fast'],
+        default='exact',
+        help="How to generate the maze. 'exact' gives the same maze for a seed"
+        " as always; 'fast' is much faster for big mazes, but gives different"
+        " mazes. (The standard maze is always generated exactly.)"
+    )
 
     args = parser.parse_args()
 
     if args.final_score:
         args.size = 30, 30
         args.cache_size = 100
-        args.random_seed = 'ShiftyMazeCodeChallenge2018'
+        args.seed = 'ShiftyMazeCodeChallenge2018'
+        args.generator = 'exact'
+
+    if args.workers < 1:
+        parser.error("--workers must be at least 1.")
+
+    if args.save_maze:
+        Maze(
+            *(args.size or (30, 30)), rand=args.seed, generator=args.generator
+        ).save(args.save_maze)
+        return
+
+    batch = args.batch is not None
+    if args.maze:
+        if len(args.maze) > 1 and not batch:
+            parser.error("Only --batch can play on several mazes.")
+        if args.batch:
+            parser.error("--batch takes no number of mazes with --maze.")
+        if args.sizes:
+            parser.error("Cannot pass --sizes and --maze together.")
+    elif args.batch == 0:
+        parser.error("--batch needs a number of mazes (unless --maze is given).")
 
     if args.interactive_demo:
+        if batch:
+            parser.error("Cannot pass --interactive-demo and --batch together.")
         bot_class = InteractiveMouse
         if not args.size:
             args.size = 5, 5
@@ -410,20 +1067,56 @@ def main():
     else:
         if not args.bot_class:
             parser.error("Either a bot class or interactive mode is required!")
-        modulename, classname = args.bot_class.rsplit('.', 1)
-        module = importlib.import_module(modulename)
-        bot_class = getattr(module, classname)
+        if len(args.bot_class) > 1 and not batch:
+            parser.error("Only --batch can compare several bot classes.")
+        bot_classes = []
+        for qualname in args.bot_class:
+            modulename, classname = qualname.rsplit('.', 1)
+            module = importlib.import_module(modulename)
+            bot_classes.append(getattr(module, classname))
+        bot_class = bot_classes[0]
 
     if not args.size:
         args.size = 30, 30
     if not args.cache_size:
         args.cache_size = 100
 
+    Maze.generator = args.generator
+    limits = ChallengeLimits(
+        args.max_turns, args.max_trip_turns, args.time_limit, args.trip_time_limit
+    )
+
+    if batch:
+        if args.seed is None:
+            args.seed = str(random.getrandbits(64))
+        results = score_bots(
+            bot_classes,
+            args.sizes or [tuple(args.size)],
+            args.batch,
+            seed=args.seed,
+            cache_size=args.cache_size,
+            workers=args.workers,
+            limits=limits,
+            oracle=args.oracle,
+            maze_files=args.maze
+        )
+        show_scores(results)
+        if not args.maze:
+            print(f"Seed: {args.seed}")
+        if args.results:
+            with open(args.results, 'w') as f:
+                for result in results:
+                    f.write(json.dumps(result._asdict()) + '\n')
+        return
+
     run_challenge(
         *args.size,
         bot_class,
         random=args.seed,
-        cache_size=args.cache_size
+        cache_size=args.cache_size,
+        limits=limits,
+        oracle=args.oracle,
+        maze_file=args.maze and args.maze[0]
     )
 
 if __name__ == '__main__':
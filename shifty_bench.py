@@ -0,0 +1,92 @@
+#!/usr/bin/env python3.7
+"""Benchmarks for shifty.py maze generation and loading.
+
+Run from the repository root: python3 shifty_bench.py [--sizes N ...]
+
+Generates square mazes of each size with each generator and reports the best
+time of a few runs, next to the time to load the same size of maze from a file
+saved with Maze.save.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import shifty
+
+
+def bench_maze(size, generator, repeat, seed):
+    """Best time (in seconds) to generate a size x size maze."""
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        shifty.Maze(size, size, rand=f"{seed}/{i}", generator=generator)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def bench_load(size, repeat, seed):
+    """Best time (in seconds) to load a saved size x size maze."""
+    maze = shifty.Maze(size, size, rand=seed, generator='fast')
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'bench.maze')
+        maze.save(filename)
+        best = None
+        for i in range(repeat):
+            start = time.perf_counter()
+            shifty.Maze.load(filename)
+            elapsed = time.perf_counter() - start
+            if best is None or elapsed < best:
+                best = elapsed
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '-s', '--sizes',
+        metavar='N',
+        type=int,
+        nargs='+',
+        default=[30, 100, 300, 1000, 2000],
+        help="Maze sizes (width and height) to benchmark."
+    )
+    parser.add_argument(
+        '-g', '--generators',
+        nargs='+',
+        choices=['exact', 'fast'],
+        default=['exact', 'fast'],
+    )
+    parser.add_argument(
+        '-n', '--repeat',
+        type=int,
+        default=3,
+        help="Generate this many mazes of each size and keep the best time."
+        " (Sizes over 300 are only generated once.)"
+    )
+    parser.add_argument('--seed', default='ShiftyMazeCodeChallenge2018')
+    args = parser.parse_args()
+
+    print(
+        f"{'Size':>11} "
+        + ' '.join(f"{generator:>10}" for generator in args.generators)
+        + f" {'load':>10}"
+    )
+    for size in args.sizes:
+        repeat = args.repeat if size <= 300 else 1
+        times = [
+            bench_maze(size, generator, repeat, args.seed)
+            for generator in args.generators
+        ]
+        times.append(bench_load(size, args.repeat, args.seed))
+        print(
+            f"{f'{size}x{size}':>11} "
+            + ' '.join(f"{seconds * 1000:>8.2f}ms" for seconds in times)
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,26 @@
 #!/usr/bin/env python3.7
 
 import argparse
+import hashlib
 import importlib
 import itertools
+import math
+import multiprocessing
 import random
-import requests
+import statistics
 import sys
+import time
+from collections import defaultdict, namedtuple
+from collections.abc import Sequence
 from traceback import print_exc
-from lxml import html
+
+import se_scrape
+from harness import BotTimeout, clear_timers, normal_quantile, set_timers, timers_available
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 untitled = itertools.count()
@@ -53,11 +66,75 @@ class Disqualification(Exception):
         self.bot = bot
 
 
+# === Time limits ===
+
+# Limits (in seconds, or None) on each take_turn call and on all of a bot's
+# calls in one game. Bots that go over them are disqualified.
+TIME_LIMIT = None
+GAME_TIME_LIMIT = None
+
+
+class BotTiming:
+    """How long a bot's take_turn calls have taken."""
+    __slots__ = ('calls', 'total', 'max')
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.calls += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def limit(self):
+        """The (time limit, reason) for the bot's next call."""
+        limit = reason = None
+        if TIME_LIMIT is not None:
+            limit, reason = TIME_LIMIT, f"took longer than {TIME_LIMIT}s for a turn"
+        if GAME_TIME_LIMIT is not None and (limit is None or GAME_TIME_LIMIT - self.total < limit):
+            limit = GAME_TIME_LIMIT - self.total
+            reason = f"took longer than {GAME_TIME_LIMIT}s in total this game"
+        return limit, reason
+
+
+def timed_turn(bot, timing, players, presents, just_stole):
+    """bot.take_turn, timed into timing and interrupted (with BotTimeout) if
+    it goes over its time limit."""
+    limit, reason = timing.limit()
+    timer = limit is not None and timers_available()
+    start = time.perf_counter()
+    try:
+        if timer:
+            previous = set_timers(limit, reason)
+        try:
+            action = bot.take_turn(players, presents, just_stole)
+        finally:
+            if timer:
+                clear_timers(previous)
+    finally:
+        elapsed = time.perf_counter() - start
+        timing.add(elapsed)
+    # Timers aren't available everywhere, so overruns that weren't
+    # interrupted count all the same
+    if limit is not None and elapsed > limit:
+        raise BotTimeout(reason)
+    return action
+
+
 class WhiteElephantBot:
+    # Each bot class gets its own stream during a game (see GameRandom), set
+    # on the class before its bots are made so that __init__ can use it too
+    random = random
+
     def __init__(self, name):
         self.name = name
 
     def steal_targets(self, presents, just_stole):
+        if isinstance(presents, Presents):
+            return presents.steal_targets(just_stole)
         return [
             name
             for name, (value, steal_count) in presents.items()
@@ -67,7 +144,7 @@ class WhiteElephantBot:
 
 class RandomBot(WhiteElephantBot):
     def take_turn(self, players, presents, just_stole):
-        return random.choice([None, *self.steal_targets(presents, just_stole)])
+        return self.random.choice([None, *self.steal_targets(presents, just_stole)])
 
 
 class GreedyBot(WhiteElephantBot):
@@ -84,17 +161,144 @@ class NiceBot(WhiteElephantBot):
         return None
 
 
-def run_round(competitors):
+class Presents(dict):
+    """Who holds which present, as (value, steal count), read-only to bots.
+
+    Every bot is handed the round's own presents instead of a copy each, and
+    the names of presents that can still be stolen are kept up to date as
+    the round goes, so steal_targets doesn't have to check every present.
+    """
+    __slots__ = ('_stealable',)
+
+    def __init__(self):
+        super().__init__()
+        self._stealable = {}
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("presents are read-only")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    # Anything made from the presents is the caller's own, and writable
+    def __or__(self, other):
+        if not isinstance(other, dict):
+            return NotImplemented
+        return {**self, **other}
+
+    def copy(self):
+        return dict(self)
+
+    def open(self, name, value):
+        dict.__setitem__(self, name, (value, 0))
+        self._stealable[name] = None
+
+    def steal(self, thief, victim):
+        value, steal_count = dict.pop(self, victim)
+        del self._stealable[victim]
+        dict.__setitem__(self, thief, (value, steal_count + 1))
+        if steal_count + 1 < MAX_STEALS:
+            self._stealable[thief] = None
+        return value
+
+    def can_steal(self, name):
+        return name in self._stealable
+
+    def steal_targets(self, just_stole):
+        targets = list(self._stealable)
+        if just_stole in self._stealable:
+            targets.remove(just_stole)
+        return targets
+
+
+class Players(Sequence):
+    """Read-only view of the names of the players still to take a turn."""
+    __slots__ = ('_names', '_start')
+
+    def __init__(self, names, start):
+        self._names = names
+        self._start = start
+
+    def __len__(self):
+        return len(self._names) - self._start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._names[self._start:][index]
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("player index out of range")
+        return self._names[self._start + index]
+
+    def __iter__(self):
+        return itertools.islice(self._names, self._start, None)
+
+    def __eq__(self, other):
+        if isinstance(other, Sequence) and not isinstance(other, str):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(self._names[self._start:])
+
+
+class GameRandom:
+    """Independent random streams for one game, all derived from its seed.
+
+    Player names, turn order, present values and each bot class draw from
+    their own streams, so a bot that draws more or fewer numbers doesn't
+    change anything else about the game.
+    """
+    def __init__(self, seed=None):
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.seed = seed
+        self.names = random.Random(f"{seed}/names")
+        self.order = random.Random(f"{seed}/order")
+        self.presents = random.Random(f"{seed}/presents")
+        self._bots = {}
+
+    def bot(self, botclass):
+        try:
+            return self._bots[botclass]
+        except KeyError:
+            rand = self._bots[botclass] = random.Random(f"{self.seed}/bot/{botclass.__name__}")
+            return rand
+
+
+def player_names(n_players, rand=random):
+    if n_players <= len(PLAYER_NAMES):
+        return rand.sample(PLAYER_NAMES, n_players)
+    # Big games (lots of clones) run out of names
+    repeats = -(-n_players // len(PLAYER_NAMES))
+    return rand.sample(
+        [f"{name} {i}" for i in range(1, repeats + 1) for name in PLAYER_NAMES],
+        n_players
+    )
+
+
+def run_round(competitors, times=None, rand=None):
     n_players = len(competitors)
-    presents = {}
+    presents = Presents()
+    if rand is None:
+        rand = GameRandom()
+    for botclass in competitors:
+        botclass.random = rand.bot(botclass)
     bots = [
         botclass(name)
         for botclass, name
-        in zip(competitors, random.sample(PLAYER_NAMES, n_players))
+        in zip(competitors, player_names(n_players, rand.names))
     ]
-    random.shuffle(bots)
-    names = [bot.name for bot in bots]
+    rand.order.shuffle(bots)
+    names = tuple(bot.name for bot in bots)
     byname = {bot.name: bot for bot in bots}
+    upcoming = [Players(names, front + 1) for front in range(n_players)]
+    if times is None:
+        times = defaultdict(BotTiming)
     verbose("[!!!] A new round begins with this turn order:")
     for bot in bots:
         verbose(f"{bot.name} (Controlled by {type(bot).__name__})")
@@ -104,28 +308,24 @@ def run_round(competitors):
         just_stole = None
         while True:
             try:
-                action = current.take_turn(
-                    names[front+1:],
-                    {**presents},
+                action = timed_turn(
+                    current,
+                    times[type(current)],
+                    upcoming[front],
+                    presents,
                     just_stole
                 )
-            except Exception as e:
+            except (Exception, BotTimeout) as e:
                 raise Disqualification(type(current)) from e
-            if (
-                action
-                and action != just_stole
-                and action in presents
-                and presents[action][0] < MAX_STEALS
-            ):
-                value, steal_count = presents.pop(action)
-                presents[current.name] = value, steal_count + 1
+            if action and action != just_stole and presents.can_steal(action):
+                value = presents.steal(current.name, action)
                 verbose(f"{current.name} steals from {action}. (value: {value})")
                 just_stole = current.name
                 current = byname[action]
             else:
-                value = random.random()
+                value = rand.presents.random()
                 verbose(f"{current.name} opens a present worth {value}.")
-                presents[current.name] = value, 0
+                presents.open(current.name, value)
                 break
     verbose("[!!!] The round ends")
     return {
@@ -134,31 +334,369 @@ def run_round(competitors):
     }
 
 
-def run_game(competitors, win_score=500):
+def play_game(competitors, win_score=500, times=None, seed=None):
+    """Play rounds until a bot reaches win_score. Returns (scores, rounds played).
+
+    Each bot class's BotTiming goes in times, if given. Games with the same
+    seed and bots play out the same (as long as the bots' only source of
+    randomness is self.random or the random module). Given a seed, this
+    reseeds the random module, for bots that use it instead of self.random;
+    without one, the random module isn't reseeded."""
     scores = {botclass.__name__: 0 for botclass in competitors}
+    if times is None:
+        times = defaultdict(BotTiming)
+    rand = GameRandom(seed)
+    if seed is not None:
+        # For bots that use the random module instead of self.random
+        random.seed(f"{rand.seed}/module")
+    rounds = 0
     while max(scores.values()) < win_score:
+        rounds += 1
         try:
-            for botname, present in run_round(competitors).items():
+            for botname, present in run_round(competitors, times, rand).items():
                 scores[botname] += present
         except Disqualification as e:
             competitors.remove(e.bot)
             alert(f"{e.bot.__name__} has been disqualified. Reason: {e.__cause__}")
         verbose()
-    info(f"[!!!] {max(scores, key=lambda s: scores[s])} is the winner!")
+    return scores, rounds
+
+
+def run_game(competitors, win_score=500, announce=True, times=None, seed=None):
+    scores, _ = play_game(competitors, win_score, times, seed)
+    if announce:
+        info(f"[!!!] {max(scores, key=lambda s: scores[s])} is the winner!")
     return scores
 
 
-def run_competition(bot_classes, win_score=500, show=print):
-    results = run_game(bot_classes, win_score)
+# === Batched Monte Carlo simulation of the built-in bots ===
+#
+# The built-in bots' behaviour only depends on present values and steal
+# counts, so many rounds can be played at once with NumPy: every array below
+# has a row per round and a column per turn order position. Turns still go in
+# order, and a turn's chain of steals is followed for all rounds at once
+# until every round's chain ends with someone opening a present.
+
+NICE, GREEDY, RANDOM = range(3)
+
+def bot_kind(botclass):
+    """NICE, GREEDY or RANDOM for (clones of) the built-in bots, else None."""
+    if botclass.steal_targets is not WhiteElephantBot.steal_targets:
+        return None
+    return {
+        NiceBot.take_turn: NICE,
+        GreedyBot.take_turn: GREEDY,
+        RandomBot.take_turn: RANDOM,
+    }.get(botclass.take_turn)
+
+
+def simulate_rounds(kinds, rounds, rng):
+    """Play rounds between built-in bots of the given kinds.
+
+    Returns a (rounds, competitors) array of the value each competitor ends
+    each round with."""
+    n_players = len(kinds)
+    # order[r, position] is the competitor taking that turn in round r
+    order = rng.random((rounds, n_players)).argsort(axis=1)
+    kind = numpy.asarray(kinds)[order]
+    value = numpy.zeros((rounds, n_players))
+    steals = numpy.zeros((rounds, n_players), dtype=int)
+    has_present = numpy.zeros((rounds, n_players), dtype=bool)
+    all_rounds = numpy.arange(rounds)
+
+    for front in range(n_players):
+        current = numpy.full(rounds, front)
+        just_stole = numpy.full(rounds, -1)
+        active = all_rounds
+        while active.size:
+            chain = numpy.arange(active.size)
+            who = current[active]
+            thief = just_stole[active]
+            eligible = has_present[active] & (steals[active] < MAX_STEALS)
+            stolen_back = thief >= 0
+            eligible[chain[stolen_back], thief[stolen_back]] = False
+            n_eligible = eligible.sum(axis=1)
+            who_kind = kind[active, who]
+            target = numpy.full(active.size, -1)
+
+            greedy = (who_kind == GREEDY) & (n_eligible > 0)
+            if greedy.any():
+                target[greedy] = numpy.where(
+                    eligible[greedy], value[active[greedy]], -1
+                ).argmax(axis=1)
+
+            randoms = who_kind == RANDOM
+            if randoms.any():
+                # 0 is opening a present, k is stealing the kth eligible one
+                pick = (rng.random(randoms.sum()) * (n_eligible[randoms] + 1)).astype(int)
+                kth = (eligible[randoms].cumsum(axis=1) == pick[:, None]).argmax(axis=1)
+                target[randoms] = numpy.where(pick > 0, kth, -1)
+
+            steal = target >= 0
+            rows, thieves, victims = active[steal], who[steal], target[steal]
+            value[rows, thieves] = value[rows, victims]
+            steals[rows, thieves] = steals[rows, victims] + 1
+            has_present[rows, thieves] = True
+            has_present[rows, victims] = False
+            just_stole[rows] = thieves
+            current[rows] = victims
+
+            rows, openers = active[~steal], who[~steal]
+            value[rows, openers] = rng.random(rows.size)
+            steals[rows, openers] = 0
+            has_present[rows, openers] = True
+            active = active[steal]
+
+    results = numpy.empty_like(value)
+    results[all_rounds[:, None], order] = value
+    return results
+
+
+def simulate_games(competitors, games, win_score=500, rng=None):
+    """Play whole games between built-in bots, a block of rounds at a time.
+
+    Returns (winners, scores): the index of each game's winner and a
+    (games, competitors) array of final scores."""
+    if rng is None:
+        rng = numpy.random.default_rng()
+    kinds = [bot_kind(botclass) for botclass in competitors]
+    n_players = len(kinds)
+    scores = numpy.zeros((games, n_players))
+    winners = numpy.full(games, -1)
+    playing = numpy.arange(games)
+    while playing.size:
+        # About a million cells per block keeps memory in check
+        block = max(8, min(1024, 2**20 // (playing.size * n_players)))
+        rounds = simulate_rounds(kinds, playing.size * block, rng)
+        running = scores[playing, None, :] + rounds.reshape(playing.size, block, n_players).cumsum(axis=1)
+        over = running.max(axis=2) >= win_score
+        finished = over.any(axis=1)
+        last_round = numpy.where(finished, over.argmax(axis=1), block - 1)
+        scores[playing] = running[numpy.arange(playing.size), last_round]
+        winners[playing[finished]] = scores[playing[finished]].argmax(axis=1)
+        playing = playing[~finished]
+    return winners, scores
+
+
+def wilson_interval(successes, trials, confidence=0.95):
+    z = normal_quantile(1 - (1 - confidence) / 2)
+    p = successes / trials
+    center = (p + z * z / (2 * trials)) / (1 + z * z / trials)
+    spread = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / (1 + z * z / trials)
+    return center - spread, center + spread
+
+
+def numpy_seed(seed):
+    """An integer seed for NumPy from any seed random.seed would take."""
+    return int.from_bytes(hashlib.sha256(str(seed).encode()).digest()[:8], 'big')
+
+
+def estimate_win_probabilities(
+    competitors, games=1000, win_score=500, confidence=0.95, seed=None
+):
+    """Estimate each bot's chance of winning from many games.
+
+    Games between built-in bots are simulated in batches with NumPy; any
+    other bot (or no NumPy) means playing each game with run_game.
+    Returns [(bot name, win probability, low, high, mean score)], most
+    likely winner first, where low and high bound the probability."""
+    names = [botclass.__name__ for botclass in competitors]
+    if seed is None:
+        seed = random.getrandbits(64)
+    if numpy is not None and None not in map(bot_kind, competitors):
+        winners, scores = simulate_games(
+            competitors, games, win_score, numpy.random.default_rng(numpy_seed(seed))
+        )
+        wins = numpy.bincount(winners, minlength=len(names)).tolist()
+        mean_scores = scores.mean(axis=0).tolist()
+    else:
+        wins = [0] * len(names)
+        mean_scores = [0.0] * len(names)
+        for number in range(games):
+            scores = run_game(
+                list(competitors), win_score, announce=False, seed=game_seed(seed, number)
+            )
+            wins[names.index(max(scores, key=lambda s: scores[s]))] += 1
+            for i, name in enumerate(names):
+                mean_scores[i] += scores[name] / games
+    return sorted(
+        (
+            (name, win_count / games, *wilson_interval(win_count, games, confidence), mean_score)
+            for name, win_count, mean_score in zip(names, wins, mean_scores)
+        ),
+        key=lambda x: -x[1]
+    )
+
+
+def show_estimates(
+    bot_classes, games, win_score=500, confidence=0.95, seed=None, show=print
+):
+    start = time.perf_counter()
+    estimates = estimate_win_probabilities(bot_classes, games, win_score, confidence, seed)
+    elapsed = time.perf_counter() - start
+    show(f"Win probabilities over {games} games ({confidence:.0%} confidence intervals):")
+    for rank, (bot, p, low, high, mean_score) in enumerate(estimates, 1):
+        show(
+            f"{rank:>2}. {bot:<20} {p:>6.1%} ({low:>6.1%} - {high:>6.1%})"
+            f"  mean score {mean_score:>7.3f}"
+        )
+    show(f"({elapsed:.2f}s)")
+    return estimates
+
+
+# === Many games at once ===
+
+BotSummary = namedtuple('BotSummary', 'name mean_score stderr mean_rank ranks')
+
+
+def game_seed(seed, number):
+    """Each game's seed, so a game plays the same wherever it runs.
+
+    (Game N of a run with seed S can be replayed with --seed S/N.)"""
+    return f"{seed}/{number}"
+
+
+_worker_bots = []
+
+def _init_worker(bot_classes, bot_source, verbosity, time_limits):
+    global TIME_LIMIT, GAME_TIME_LIMIT
+    set_verbosity(verbosity)
+    TIME_LIMIT, GAME_TIME_LIMIT = time_limits
+    if bot_source is not None:
+        # Scraped bots and clones can't be pickled, so workers build them
+        # again (from the answers the parent already fetched)
+        bot_classes = collect_bots(**bot_source)
+    _worker_bots[:] = bot_classes
+
+def _worker_game(job):
+    number, seed, win_score = job
+    return play_game(list(_worker_bots), win_score, seed=game_seed(seed, number))
+
+
+def run_games(
+    bot_classes, games, win_score=500, workers=1, seed=None,
+    bot_source=None, verbosity=0
+):
+    """Play independent games, in a pool of worker processes if workers > 1.
+
+    bot_source holds collect_bots() arguments for workers to get the bots
+    from, if they don't survive pickling. (Pass scraped bots as answers, so
+    that every worker builds them from the same code without refetching it.) Returns (summaries, rounds,
+    seconds), where summaries are BotSummary tuples, best mean score
+    first, and ranks[i] is how many games a bot finished (i+1)th in.
+
+    Every game has a seed (derived from seed, or a random one if it's None),
+    so every game reseeds the random module; when the games run in this
+    process, its previous state is put back afterwards."""
+    if seed is None:
+        seed = random.getrandbits(64)
+    jobs = [(number, seed, win_score) for number in range(games)]
+    names = [botclass.__name__ for botclass in bot_classes]
+    all_scores = {name: [] for name in names}
+    ranks = {name: [0] * len(names) for name in names}
+    total_rounds = 0
+
+    start = time.perf_counter()
+    if workers > 1:
+        with multiprocessing.Pool(
+            workers,
+            initializer=_init_worker,
+            initargs=(
+                None if bot_source else bot_classes, bot_source, verbosity,
+                (TIME_LIMIT, GAME_TIME_LIMIT)
+            )
+        ) as pool:
+            results = list(pool.imap(_worker_game, jobs))
+    else:
+        state = random.getstate()
+        _worker_bots[:] = bot_classes
+        try:
+            results = [_worker_game(job) for job in jobs]
+        finally:
+            random.setstate(state)
+    elapsed = time.perf_counter() - start
+
+    for scores, rounds in results:
+        total_rounds += rounds
+        for rank, name in enumerate(sorted(scores, key=lambda s: -scores[s])):
+            ranks[name][rank] += 1
+            all_scores[name].append(scores[name])
+    summaries = sorted(
+        (
+            BotSummary(
+                name,
+                statistics.mean(all_scores[name]),
+                statistics.stdev(all_scores[name]) / math.sqrt(games) if games > 1 else 0.0,
+                sum(rank * count for rank, count in enumerate(ranks[name], 1)) / games,
+                ranks[name]
+            )
+            for name in names
+        ),
+        key=lambda summary: -summary.mean_score
+    )
+    return summaries, total_rounds, elapsed
+
+
+def show_games(
+    bot_classes, games, win_score=500, workers=1, seed=None,
+    bot_source=None, verbosity=0, show=print
+):
+    summaries, rounds, elapsed = run_games(
+        bot_classes, games, win_score, workers, seed, bot_source, verbosity
+    )
+    shown_ranks = min(3, len(summaries))
+    show(
+        f"    {'Bot':<20} {'Mean score':>10} {'SE':>7}  {'Mean rank':>9}  "
+        + ' '.join(f"{ordinal(rank):>6}" for rank in range(1, shown_ranks + 1))
+    )
+    for position, summary in enumerate(summaries, 1):
+        show(
+            f"{position:>2}. {summary.name:<20} {summary.mean_score:>10.3f} {summary.stderr:>7.3f}"
+            f"  {summary.mean_rank:>9.2f}  "
+            + ' '.join(f"{count / games:>6.1%}" for count in summary.ranks[:shown_ranks])
+        )
+    show(
+        f"Played {games} games ({rounds} rounds) in {elapsed:.2f}s"
+        f" ({rounds / elapsed:.0f} rounds/s)"
+    )
+    return summaries
+
+
+def ordinal(n):
+    if 10 <= n % 100 < 20:
+        return f"{n}th"
+    return f"{n}{ {1: 'st', 2: 'nd', 3: 'rd'}.get(n % 10, 'th') }"
+
+
+def run_competition(bot_classes, win_score=500, show=print, seed=None):
+    show = show or (lambda x: None)
+    if seed is None:
+        seed = random.getrandbits(64)
+    times = defaultdict(BotTiming)
+    results = run_game(bot_classes, win_score, times=times, seed=seed)
     ranking = sorted(results.items(), key=lambda x: -x[1])
     for rank, (bot, score) in enumerate(ranking, 1):
-        (show or (lambda x: None))(f"{rank:>2}. {bot:<20} {score:>7.3f}")
+        show(f"{rank:>2}. {bot:<20} {score:>7.3f}")
+    show_times(times, show)
+    show(f"Seed: {seed}")
     return ranking
 
 
-def get_answers(url):
-    page = html.fromstring(requests.get(url).text)
-    for answer in page.xpath("//div[@class='answer']"):
+def show_times(times, show=print):
+    show(f"    {'Bot':<20} {'Calls':>8} {'Total':>9} {'Mean':>10} {'Max':>10}")
+    for botclass, timing in sorted(times.items(), key=lambda x: -x[1].total):
+        show(
+            f"    {botclass.__name__:<20} {timing.calls:>8} {timing.total:>8.3f}s"
+            f" {timing.total / max(timing.calls, 1) * 1e6:>8.1f}us"
+            f" {timing.max * 1e3:>8.3f}ms"
+        )
+
+
+def get_answers(url, cache_dir=se_scrape.DEFAULT_CACHE_DIR):
+    for answer in itertools.chain.from_iterable(
+        page.xpath("//div[@class='answer']")
+        for page in se_scrape.answer_pages(url, cache_dir)
+    ):
         try:
             headers = answer.xpath(".//h1")
             title = headers[0].text if headers else f"Untiltled-{next(untitled)}"
@@ -170,8 +708,13 @@ def get_answers(url):
             yield code, title, user
 
 
-def extract_bots(base_url):
-    for code, title, user in get_answers(base_url):
+def extract_bots(base_url, cache_dir=se_scrape.DEFAULT_CACHE_DIR):
+    return answer_bots(get_answers(base_url, cache_dir))
+
+
+def answer_bots(answers):
+    """The bot classes defined in (code, title, user) answers."""
+    for code, title, user in answers:
         try:
             debug(code)
             bot_code = compile(code, f"{user} - {title}", 'exec')
@@ -187,6 +730,50 @@ def extract_bots(base_url):
             print_exc()
 
 
+def set_verbosity(verbosity):
+    if verbosity >= 1:
+        global verbose
+        verbose = print
+    if verbosity >= 2:
+        global debug
+        debug = print
+    if verbosity <= -1:
+        global info
+        info = lambda *_, **__: None
+    if verbosity <= -2:
+        global alert
+        alert = lambda *_, **__: None
+    if verbosity <= -3:
+        global critical
+        alert = lambda *_, **__: None
+
+
+def collect_bots(local_bots=(), answers=(), exclude=(), clone=None):
+    bot_classes = [RandomBot, GreedyBot, NiceBot]
+
+    for qualname in local_bots:
+        modulename, classname = qualname.rsplit('.', 1)
+        module = importlib.import_module(modulename)
+        bot_classes.append(getattr(module, classname))
+
+    bot_classes += answer_bots(answers)
+
+    if exclude:
+        bot_classes = [
+            bot for bot in bot_classes if bot.__name__ not in exclude
+        ]
+
+    if clone and clone > 0:
+        base_bots = [*bot_classes]
+        for i in range(clone):
+            bot_classes += [
+                type(f'{bot.__name__}__{i+1}', (bot,), {})
+                for bot in base_bots
+            ]
+
+    return bot_classes
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Test driver for the "White Elephant Exchange" king of the'
@@ -202,6 +789,11 @@ def main():
         '-u', '--url',
         help="URL to use for extracting bots from answers."
     )
+    parser.add_argument(
+        '--cache-dir',
+        default=se_scrape.DEFAULT_CACHE_DIR,
+        help="Where to cache downloaded answer pages."
+    )
     parser.add_argument(
         '-c', '--clone',
         metavar='N',
@@ -220,6 +812,51 @@ def main():
         default=[],
         help="Exclude certain bots (for being broken)"
     )
+    modes = parser.add_mutually_exclusive_group()
+    modes.add_argument(
+        '-e', '--estimate',
+        metavar='GAMES',
+        type=int,
+        help="Instead of playing one game, estimate each bot's chance of winning"
+        " from this many games. (Much faster if all the bots are built-in ones.)"
+    )
+    modes.add_argument(
+        '-g', '--games',
+        metavar='N',
+        type=int,
+        help="Instead of playing one game, play N independent games and show"
+        " each bot's mean score (with its standard error) and how often it"
+        " finished in each place."
+    )
+    parser.add_argument(
+        '-j', '--workers',
+        type=int,
+        default=1,
+        help="Play --games in this many processes."
+    )
+    parser.add_argument(
+        '--confidence',
+        type=float,
+        default=0.95,
+        help="Confidence level for --estimate's intervals."
+    )
+    parser.add_argument(
+        '-s', '--seed',
+        help="Seed for the game(s), to play them exactly the same way again."
+        " Game N of a --games run can be replayed on its own with --seed SEED/N."
+    )
+    parser.add_argument(
+        '-t', '--time-limit',
+        type=float,
+        metavar='SECONDS',
+        help="Disqualify bots that take longer than this to take a turn."
+    )
+    parser.add_argument(
+        '--game-time-limit',
+        type=float,
+        metavar='SECONDS',
+        help="Disqualify bots once their turns have taken this long in total during a game."
+    )
     parser.add_argument(
         '-v', '--verbose',
         action='count',
@@ -235,48 +872,34 @@ def main():
 
     args = parser.parse_args()
 
-    verbosity = args.verbose - args.quiet
+    if args.workers < 1:
+        parser.error("--workers must be at least 1.")
 
-    if verbosity >= 1:
-        global verbose
-        verbose = print
-    if verbosity >= 2:
-        global debug
-        debug = print
-    if verbosity <= -1:
-        global info
-        info = lambda *_, **__: None
-    if verbosity <= -2:
-        global alert
-        alert = lambda *_, **__: None
-    if verbosity <= -3:
-        global critical
-        alert = lambda *_, **__: None
-
-    bot_classes = [RandomBot, GreedyBot, NiceBot]
-
-    for qualname in args.local_bots:
-        modulename, classname = qualname.rsplit('.', 1)
-        module = importlib.import_module(modulename)
-        bot_classes.append(getattr(module, classname))
-
-    if args.url:
-        bot_classes += extract_bots(args.url)
-
-    if args.exclude:
-        bot_classes = [
-            bot for bot in bot_classes if bot.__name__ not in args.exclude
-        ]
+    verbosity = args.verbose - args.quiet
+    set_verbosity(verbosity)
 
-    if args.clone and args.clone > 0:
-        base_bots = [*bot_classes]
-        for i in range(args.clone):
-            bot_classes += [
-                type(f'{bot.__name__}__{i+1}', (bot,), {})
-                for bot in base_bots
-            ]
+    global TIME_LIMIT, GAME_TIME_LIMIT
+    TIME_LIMIT, GAME_TIME_LIMIT = args.time_limit, args.game_time_limit
 
-    run_competition(bot_classes, args.win_score)
+    bot_source = dict(
+        local_bots=args.local_bots,
+        answers=list(get_answers(args.url, args.cache_dir)) if args.url else [],
+        exclude=args.exclude,
+        clone=args.clone,
+    )
+    bot_classes = collect_bots(**bot_source)
+
+    if args.estimate:
+        show_estimates(
+            bot_classes, args.estimate, args.win_score, args.confidence, args.seed
+        )
+    elif args.games:
+        show_games(
+            bot_classes, args.games, args.win_score, args.workers, args.seed,
+            bot_source=bot_source, verbosity=verbosity
+        )
+    else:
+        run_competition(bot_classes, args.win_score, seed=args.seed)
 
 if __name__ == '__main__':
     main()
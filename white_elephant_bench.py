@@ -0,0 +1,64 @@
+#!/usr/bin/env python3.7
+"""Benchmarks for the white_elephant.py game engine.
+
+Run from the repository root: python3 white_elephant_bench.py [--clones N ...]
+
+Plays rounds between the built-in bots plus N clones of each (as --clone
+does) and reports rounds/s for each N.
+"""
+
+import argparse
+import random
+import time
+
+import white_elephant
+
+
+def bench_rounds(clones, seconds, seed):
+    """Play rounds for about the given number of seconds (at least one round).
+
+    Returns (players, rounds, seconds)."""
+    bot_classes = white_elephant.collect_bots(clone=clones)
+    rand = white_elephant.GameRandom(seed)
+    state = random.getstate()
+    random.seed(seed)
+    try:
+        rounds = 0
+        start = time.perf_counter()
+        while True:
+            white_elephant.run_round(bot_classes, None, rand)
+            rounds += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= seconds:
+                return len(bot_classes), rounds, elapsed
+    finally:
+        random.setstate(state)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '-c', '--clones',
+        metavar='N',
+        type=int,
+        nargs='+',
+        default=[10, 100, 1000],
+        help="Clone counts to benchmark."
+    )
+    parser.add_argument(
+        '-t', '--seconds',
+        type=float,
+        default=3.0,
+        help="How long to play rounds for at each clone count."
+    )
+    parser.add_argument('-s', '--seed', default='white elephant')
+    args = parser.parse_args()
+
+    print(f"{'Clones':>7} {'Players':>8} {'Rounds':>8} {'Rounds/s':>10}")
+    for clones in args.clones:
+        players, rounds, elapsed = bench_rounds(clones, args.seconds, args.seed)
+        print(f"{clones:>7} {players:>8} {rounds:>8} {rounds / elapsed:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()